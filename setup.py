@@ -14,6 +14,10 @@ setup(
         "openpyxl>=3.0.7",
         "xlrd>=2.0.1"
     ],
+    extras_require={
+        # 可选的导出格式：Parquet/Feather 和 zstd 压缩的 CSV
+        "export": ["pyarrow>=7.0", "zstandard>=0.18"]
+    },
     entry_points={
         "console_scripts": [
             "data-annotator=src.main:main"
@@ -0,0 +1,67 @@
+import threading
+import time
+
+
+class AutosaveScheduler:
+    """防抖的后台自动保存
+
+    有未保存修改时，在最后一次修改 delay 秒后、第一次未保存修改 max_delay 秒后，
+    或累计 max_edits 次修改时（以先到者为准）在后台线程调用 flush。
+    """
+
+    def __init__(self, flush, delay=2.0, max_delay=10.0, max_edits=50):
+        self.flush = flush
+        self.delay = delay
+        self.max_delay = max_delay
+        self.max_edits = max_edits
+        self.last_saved = None
+
+        self._edits = 0
+        self._first_edit = None
+        self._last_edit = None
+        self._closed = False
+        self._wakeup = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def notify_edit(self):
+        """记录一次修改"""
+        with self._wakeup:
+            now = time.monotonic()
+            self._edits += 1
+            self._last_edit = now
+            if self._first_edit is None:
+                self._first_edit = now
+            self._wakeup.notify()
+
+    def _due(self):
+        """距离下次保存的秒数，需要立即保存时返回 0"""
+        if self._edits >= self.max_edits:
+            return 0
+        now = time.monotonic()
+        due = min(self._last_edit + self.delay, self._first_edit + self.max_delay)
+        return max(due - now, 0)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._closed and (self._edits == 0 or self._due() > 0):
+                    self._wakeup.wait(self._due() if self._edits else None)
+                if self._closed:
+                    return
+                self._edits = 0
+                self._first_edit = None
+                self._last_edit = None
+
+            try:
+                self.flush()
+                self.last_saved = time.time()
+            except Exception as e:
+                print(f"Error during autosave: {e}")
+
+    def close(self):
+        """停止调度线程（最后一次保存由调用方负责）"""
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join(timeout=5)
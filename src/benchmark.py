@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from . import __version__
+from .record_source import CSV_READ_OPTIONS, CsvRecordSource, build_row_index, index_path
+from .session import AnnotationSession
+from .session_state import load_state
+from .utils import load_data_file
+
+LABEL_OPTIONS = ["正面", "负面", "中性"]
+# 导入界面模块的耗时上限（秒），以及启动时不应导入的数据处理依赖
+IMPORT_BUDGET_S = 0.5
+HEAVY_MODULES = ["numpy", "pandas", "openpyxl", "xlrd", "pyarrow"]
+
+
+def generate_dataset(path, rows, columns, text_length, seed=0):
+    """生成包含中文文本列的合成CSV数据集
+
+    每个文本列从随机生成的字符串池中抽样，保证大数据量时生成速度。
+    """
+    rng = np.random.default_rng(seed)
+    pool_size = min(rows, 4096)
+    data = {"ID": np.arange(1, rows + 1)}
+
+    for i in range(columns - 1):
+        if i % 3 == 2:
+            data[f"num_{i}"] = rng.integers(0, 1000, rows)
+            continue
+        # 常用汉字区间 U+4E00 - U+9FA5
+        chars = rng.integers(0x4E00, 0x9FA6, (pool_size, text_length))
+        pool = np.array(["".join(map(chr, row)) for row in chars], dtype=object)
+        data[f"text_{i}"] = pool[rng.integers(0, pool_size, rows)]
+
+    pd.DataFrame(data).to_csv(path, index=False)
+    return path
+
+
+def summarize(durations):
+    """单次操作耗时统计（毫秒）"""
+    durations = sorted(d * 1000 for d in durations)
+    return {
+        "count": len(durations),
+        "mean_ms": statistics.fmean(durations),
+        "p50_ms": durations[len(durations) // 2],
+        "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+        "max_ms": durations[-1],
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def bench_load(path):
+    """冷启动（无行索引）和热启动（有行索引）加载"""
+    for sidecar in index_path(path):
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+
+    cold, (source, _) = timed(load_data_file, path)
+    source.close()
+    warm, (source, _) = timed(load_data_file, path)
+    return {"cold_s": cold, "warm_s": warm, "rows": len(source)}, source
+
+
+def bench_sequential(session, steps):
+    durations = []
+    session.go_to(0)
+    for _ in range(min(steps, len(session) - 1)):
+        start = time.perf_counter()
+        session.next_record()
+        session.get_record()
+        session.get_label()
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def bench_random(session, steps, rng):
+    durations = []
+    for _ in range(steps):
+        index = rng.randrange(len(session))
+        start = time.perf_counter()
+        session.go_to(index)
+        session.get_record()
+        session.get_label()
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def bench_labeling(session, steps, rng):
+    durations = []
+    for _ in range(steps):
+        session.go_to(rng.randrange(len(session)))
+        value = rng.choice(LABEL_OPTIONS)
+        start = time.perf_counter()
+        session.set_label(value)
+        durations.append(time.perf_counter() - start)
+
+    flush, _ = timed(session.flush)
+    result = summarize(durations)
+    result["flush_ms"] = flush * 1000
+    return result
+
+
+def bench_save(session):
+    duration, (success, result) = timed(session.export, "benchmark_export")
+    if not success:
+        return {"error": result}
+    return {"export_s": duration, "bytes": os.path.getsize(result[0])}
+
+
+def resume_session(path):
+    """按会话文件重新打开数据源和标注会话，返回打开的会话"""
+    state = load_state(path)
+    source, _ = load_data_file(path)
+    return AnnotationSession(
+        source, path, state["label_column"], state["label_type"], state["label_options"], state=state
+    )
+
+
+def bench_resume(path):
+    """恢复会话：读取会话文件、用行索引重新打开数据源并映射标注数组"""
+    duration, session = timed(resume_session, path)
+    result = {"resume_s": duration, "resumed": session.resumed, "position": session.current_record}
+    session.close()
+    session.source.close()
+    return result
+
+
+def check_row_index(paths=None):
+    """回归检查：行索引找到的每一行与 pandas 解析的结果一致（默认检查 examples 中的 CSV）
+
+    examples/quoted_fields.csv 包含未加引号字段中的引号、引号内的逗号和换行、转义引号和空行。
+    """
+    if paths is None:
+        examples = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+        paths = sorted(
+            os.path.join(examples, name) for name in os.listdir(examples) if name.endswith(".csv")
+        ) if os.path.isdir(examples) else []
+
+    failures = []
+    for path in paths:
+        expected = pd.read_csv(path, **CSV_READ_OPTIONS)
+        source = CsvRecordSource(path, offsets=build_row_index(path))
+        try:
+            rows = [list(source.get_record(i).values()) for i in range(len(source))]
+        finally:
+            source.close()
+        if rows != expected.values.tolist():
+            failures.append(f"{os.path.basename(path)}: index {len(rows)} rows, pandas {len(expected)} rows")
+    return {"files": len(paths), "failures": failures, "ok": not failures}
+
+
+def bench_startup(budget=IMPORT_BUDGET_S, runs=5):
+    """在新的解释器中导入界面模块，测量启动导入耗时，并检查是否提前导入了数据处理依赖"""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {__package__}.gui\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    durations = []
+    heavy = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+        durations.append(float(output[0]))
+        heavy.update(name for name in output[1].split(",") if name)
+
+    import_s = statistics.median(durations)
+    return {
+        "import_s": import_s,
+        "budget_s": budget,
+        "heavy_modules": sorted(heavy),
+        "ok": import_s <= budget and not heavy,
+    }
+
+
+def run_benchmarks(rows, columns, text_length, steps, workdir, seed=0):
+    """运行全部场景，返回结果字典"""
+    rng = random.Random(seed)
+    path = os.path.join(workdir, "benchmark.csv")
+
+    generate_time, _ = timed(generate_dataset, path, rows, columns, text_length, seed)
+    results = {"generate_s": generate_time, "file_bytes": os.path.getsize(path)}
+
+    results["load"], source = bench_load(path)
+    session = AnnotationSession(source, path, "label", "categorical", LABEL_OPTIONS)
+    try:
+        results["sequential_navigation"] = bench_sequential(session, steps)
+        results["random_navigation"] = bench_random(session, steps, rng)
+        results["labeling"] = bench_labeling(session, steps, rng)
+        results["save"] = bench_save(session)
+        results["record_cache"] = session.record_cache.stats()
+    finally:
+        session.close()
+        source.close()
+    results["resume"] = bench_resume(path)
+    return results
+
+
+def compare(current, previous, prefix=""):
+    """打印与之前结果相比的耗时变化"""
+    for key, value in current.items():
+        old = previous.get(key) if isinstance(previous, dict) else None
+        if isinstance(value, dict):
+            compare(value, old or {}, f"{prefix}{key}.")
+        elif (key.endswith("_s") or key.endswith("_ms")) and isinstance(old, (int, float)) and old:
+            print(f"{prefix}{key}: {old:.4f} -> {value:.4f} ({value / old:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark load, navigation, labeling and save")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--text-length", type=int, default=50)
+    parser.add_argument("--steps", type=int, default=2000, help="Operations per navigation/labeling scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default="benchmark-results")
+    parser.add_argument("--compare", default=None, help="Previous result JSON to compare against")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_S,
+                        help="Maximum seconds to import the GUI module")
+    parser.add_argument("--startup-only", action="store_true",
+                        help="Only check the GUI import time budget (exit code 1 when exceeded)")
+    parser.add_argument("--check-index", action="store_true",
+                        help="Only check the CSV row index against pandas on examples/*.csv (exit code 1 on mismatch)")
+    args = parser.parse_args(argv)
+
+    row_index = check_row_index()
+    for failure in row_index["failures"]:
+        print(f"Row index check failed: {failure}")
+    if args.check_index:
+        print(json.dumps(row_index, indent=2))
+        return 0 if row_index["ok"] else 1
+
+    startup = bench_startup(args.import_budget)
+    if not startup["ok"]:
+        print(
+            f"Startup import check failed: {startup['import_s']:.3f}s (budget {args.import_budget:.3f}s), "
+            f"data libraries imported at startup: {', '.join(startup['heavy_modules']) or 'none'}"
+        )
+    if args.startup_only:
+        print(json.dumps(startup, indent=2))
+        return 0 if startup["ok"] else 1
+
+    workdir = tempfile.mkdtemp(prefix="annotation-bench-")
+    try:
+        results = run_benchmarks(args.rows, args.columns, args.text_length, args.steps, workdir, args.seed)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    results["startup"] = startup
+    results["row_index"] = row_index
+
+    report = {
+        "version": __version__,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "params": {
+            "rows": args.rows,
+            "columns": args.columns,
+            "text_length": args.text_length,
+            "steps": args.steps,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(
+        args.output_dir, f"{__version__}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {output_path}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f)["results"])
+    return 0 if startup["ok"] and row_index["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
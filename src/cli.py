@@ -0,0 +1,195 @@
+import argparse
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .config import config
+from .utils import load_data_file, save_annotated_data
+from .writers import FORMATS
+
+
+def parse_rule(text):
+    """解析 LABEL=PATTERN 形式的规则"""
+    label, sep, pattern = text.partition("=")
+    if not sep or not label or not pattern:
+        raise argparse.ArgumentTypeError(f"Rule must be LABEL=PATTERN: {text}")
+    return label, pattern
+
+
+def read_label_file(filepath):
+    """读取外部标注文件（CSV或Excel）"""
+    if filepath.endswith(('.xlsx', '.xls')):
+        return pd.read_excel(filepath, dtype=str)
+    return pd.read_csv(filepath, dtype=str, keep_default_na=False)
+
+
+def normalize_keys(series):
+    """关键列统一为字符串：缺失值为空字符串，整数值的浮点数去掉小数部分
+
+    含缺失值的整数列会被 pandas 读成浮点数（1 变成 1.0），两边按同样的规则转换后才能匹配。
+    """
+    text = series.astype(object).where(series.notna(), "")
+    if pd.api.types.is_float_dtype(series):
+        integral = series.notna() & (series == series.round())
+        text[integral] = series[integral].astype(np.int64).astype(str)
+    return text.astype(str)
+
+
+def initial_labels(source, label_column):
+    """已有标注列的值作为初始标注，否则全部为空"""
+    if label_column in source.columns:
+        existing = source.get_column(label_column)
+        existing = existing.astype(object).where(existing.notna(), "").astype(str)
+        return np.array(existing, dtype=object)
+    return np.full(len(source), "", dtype=object)
+
+
+def import_labels(source, labels, args):
+    """按关键列将外部标注文件向量化地合并到数据集"""
+    label_df = read_label_file(args.labels)
+    value_column = args.labels_value_column or args.label_column
+    for col in (args.key, value_column):
+        if col not in label_df.columns:
+            raise ValueError(f"Column '{col}' not found in {args.labels}")
+    if args.key not in source.columns:
+        raise ValueError(f"Column '{args.key}' not found in {args.input}")
+
+    # 关键列重复时以最后一条为准，空关键值不参与匹配
+    label_df = label_df.assign(**{args.key: normalize_keys(label_df[args.key])})
+    label_df = label_df[label_df[args.key] != ""]
+    mapping = label_df.drop_duplicates(args.key, keep="last").set_index(args.key)[value_column]
+
+    changed = 0
+    matched = 0
+    start = 0
+    for chunk in source.iter_chunks():
+        keys = normalize_keys(chunk[args.key])
+        new_values = keys.map(mapping).to_numpy(dtype=object)
+        end = start + len(chunk)
+
+        current = labels[start:end]
+        mask = pd.notna(new_values)
+        matched += int(mask.sum())
+        if not args.overwrite:
+            mask &= current == ""
+        current[mask] = new_values[mask]
+        changed += int(mask.sum())
+        start = end
+
+    if matched == 0 and len(mapping):
+        print(f"{config.get('warning')}: no key in column '{args.key}' of {args.labels} matched {args.input}",
+              file=sys.stderr)
+    return changed
+
+
+def apply_rules(source, labels, args):
+    """按规则（关键词或正则）一次遍历全表进行标注，先匹配的规则优先"""
+    rules = [(label, re.escape(word)) for label, word in args.keyword]
+    rules += [(label, pattern) for label, pattern in args.regex]
+    if not rules:
+        raise ValueError("At least one --keyword or --regex rule is required")
+
+    columns = args.columns or [c for c in source.columns if c != args.label_column]
+    for col in columns:
+        if col not in source.columns:
+            raise ValueError(f"Column '{col}' not found in {args.input}")
+
+    changed = 0
+    start = 0
+    for chunk in source.iter_chunks():
+        end = start + len(chunk)
+        current = labels[start:end]
+        text = [chunk[col].astype(str) for col in columns]
+        pending = np.ones(len(chunk), dtype=bool) if args.overwrite else current == ""
+
+        for label, pattern in rules:
+            if not pending.any():
+                break
+            matched = np.zeros(len(chunk), dtype=bool)
+            for values in text:
+                matched |= values.str.contains(pattern, regex=True, case=not args.ignore_case).to_numpy()
+            mask = matched & pending
+            current[mask] = label
+            pending &= ~mask
+            changed += int(mask.sum())
+        start = end
+    return changed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="data-annotator",
+        description="Headless batch labeling. Run without arguments to start the GUI."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub):
+        sub.add_argument("input", help="Dataset file (CSV or Excel)")
+        sub.add_argument("--label-column", default="label", help="Label column to fill (default: label)")
+        sub.add_argument("--output", required=True,
+                         help="Output filename without extension, saved next to the input file")
+        sub.add_argument("--format", default="csv", choices=sorted(FORMATS),
+                         help="Output format (default: csv); parquet/feather need pyarrow, csv.zst needs zstandard")
+        sub.add_argument("--sheet", default=None, help="Excel worksheet name")
+        sub.add_argument("--overwrite", action="store_true", help="Overwrite labels that are already set")
+
+    import_parser = subparsers.add_parser("import-labels", help="Join labels from another file by key column")
+    add_common(import_parser)
+    import_parser.add_argument("--labels", required=True, help="File containing the labels to import")
+    import_parser.add_argument("--key", required=True, help="Key column present in both files")
+    import_parser.add_argument("--labels-value-column", default=None,
+                               help="Label column in the labels file (default: same as --label-column)")
+    import_parser.set_defaults(handler=import_labels)
+
+    rule_parser = subparsers.add_parser("rule-label", help="Apply keyword/regex rules across the table")
+    add_common(rule_parser)
+    rule_parser.add_argument("--keyword", type=parse_rule, action="append", default=[],
+                             metavar="LABEL=WORD", help="Label rows containing WORD")
+    rule_parser.add_argument("--regex", type=parse_rule, action="append", default=[],
+                             metavar="LABEL=PATTERN", help="Label rows matching the regular expression")
+    rule_parser.add_argument("--columns", nargs="+", default=None,
+                             help="Columns to search (default: all except the label column)")
+    rule_parser.add_argument("--ignore-case", action="store_true", help="Case-insensitive matching")
+    rule_parser.set_defaults(handler=apply_rules)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    start_time = time.perf_counter()
+    source, error = load_data_file(args.input, sheet_name=args.sheet)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+
+    try:
+        labels = initial_labels(source, args.label_column)
+        changed = args.handler(source, labels, args)
+        success, result = save_annotated_data(
+            source, labels, args.label_column, args.input, args.output, fmt=args.format
+        )
+    except (ValueError, re.error) as e:
+        print(f"{config.get('error')}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        source.close()
+
+    if not success:
+        print(f"{config.get('error')}: {result}", file=sys.stderr)
+        return 1
+
+    save_path, file_size, save_time, throughput = result
+    print(f"Labeled {changed:,} of {len(labels):,} rows in {time.perf_counter() - start_time:.2f}s")
+    print(f"{config.get('save_location')}{save_path}")
+    print(f"{config.get('file_size')}{file_size}")
+    print(f"{config.get('write_speed')}{throughput}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+# 唯一值占比低于该阈值的文本列转换为分类类型
+CATEGORY_RATIO = 0.5
+
+
+def _compact_column(series):
+    """为单列选择占用内存最小且不损失信息的类型"""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+
+    if pd.api.types.is_integer_dtype(series):
+        downcast = "unsigned" if len(series) and series.min() >= 0 else "integer"
+        return pd.to_numeric(series, downcast=downcast)
+
+    if pd.api.types.is_float_dtype(series):
+        # 只有在 float32 能精确表示全部值时才降精度
+        as_float32 = series.astype(np.float32)
+        if ((as_float32.astype(series.dtype) == series) | series.isna()).all():
+            return as_float32
+        return series
+
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        non_null = series.dropna()
+        if len(non_null) and non_null.map(type).eq(str).all():
+            if series.nunique() < len(series) * CATEGORY_RATIO:
+                return series.astype("category")
+    return series
+
+
+def compact_dataframe(df):
+    """压缩 DataFrame 的列类型，返回 (新 DataFrame, 每列内存报告)
+
+    报告为 [(列名, 原类型, 新类型, 原字节数, 新字节数), ...]。
+    """
+    before = df.memory_usage(deep=True, index=False)
+    compacted = pd.DataFrame({col: _compact_column(df[col]) for col in df.columns})
+    after = compacted.memory_usage(deep=True, index=False)
+
+    report = [
+        (col, str(df[col].dtype), str(compacted[col].dtype), int(before[col]), int(after[col]))
+        for col in df.columns
+    ]
+    return compacted, report
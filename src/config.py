@@ -1,3 +1,4 @@
+import getpass
 import json
 import os
 from pathlib import Path
@@ -8,6 +9,32 @@ class Config:
         self.current_language = "en"  # 默认英文
         self.strings = self.load_strings()
 
+        # 记录预取缓存：向后/向前预取的记录数和缓存内存上限
+        self.prefetch_ahead = 32
+        self.prefetch_behind = 8
+        self.cache_memory_mb = 64
+        # 单条视图中每个单元格最多显示的字符数和行数，超出部分可展开查看
+        self.cell_preview_chars = 2000
+        self.cell_preview_lines = 20
+
+        # 自动保存：最后一次修改后的等待秒数、最长等待秒数和触发保存的修改次数
+        self.autosave_delay = 2.0
+        self.autosave_max_delay = 10.0
+        self.autosave_max_edits = 50
+
+        # 建立搜索索引的列，None 表示除标注列外的全部列
+        self.search_columns = None
+
+        # 紧凑加载：读入内存并压缩列类型
+        self.compact_load = False
+
+        # Excel 解析结果的二进制缓存目录
+        self.cache_dir = str(Path.home() / ".cache" / "table-annotation-tool")
+
+        # 多人标注：共享 SQLite 标注库的路径（None 表示单人模式）和当前标注者名称
+        self.shared_store = None
+        self.annotator = getpass.getuser()
+
     def load_strings(self):
         """加载语言字符串"""
         resources_dir = Path(__file__).parent / "resources"
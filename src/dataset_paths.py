@@ -0,0 +1,38 @@
+import glob
+import os
+import re
+
+# 这里只做路径处理，不依赖 numpy/pandas，启动界面可以直接使用
+
+
+def is_sharded_path(path):
+    """路径是否表示分片数据集：目录或通配符模式"""
+    return os.path.isdir(path) or any(ch in os.path.basename(path) for ch in "*?[")
+
+
+def list_shards(path):
+    """分片数据集中的CSV文件，按文件名排序"""
+    pattern = os.path.join(path, "*.csv") if os.path.isdir(path) else path
+    return sorted(p for p in glob.glob(pattern) if p.endswith(".csv") and os.path.isfile(p))
+
+
+def dataset_size(path):
+    """数据文件或分片数据集的总字节数"""
+    if is_sharded_path(path):
+        return sum(os.path.getsize(p) for p in list_shards(path))
+    return os.path.getsize(path)
+
+
+def source_fingerprint(source_path):
+    """数据源指纹：每个文件（分片数据集为每个分片）的文件名、大小和修改时间"""
+    paths = list_shards(source_path) if is_sharded_path(source_path) else [source_path]
+    fingerprint = []
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def sidecar_base(source_path):
+    """数据源旁侧车文件的路径前缀；分片数据集的通配符模式中的特殊字符替换为下划线"""
+    return re.sub(r"[*?\[\]]", "_", source_path.rstrip("/\\"))
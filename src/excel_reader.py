@@ -0,0 +1,149 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from .config import config
+from .record_source import LoadCancelled
+
+# 每读取多少行报告一次进度并检查取消
+EXCEL_CHUNK_ROWS = 5000
+
+
+def list_excel_sheets(filepath):
+    """列出工作簿中的工作表名称，不解析工作表内容"""
+    if filepath.endswith('.xls'):
+        import xlrd
+        book = xlrd.open_workbook(filepath, on_demand=True)
+        try:
+            return book.sheet_names()
+        finally:
+            book.release_resources()
+
+    import openpyxl
+    workbook = openpyxl.load_workbook(filepath, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def _iter_xlsx_rows(filepath, sheet_name):
+    import openpyxl
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        for row in sheet.iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def _iter_xls_rows(filepath, sheet_name):
+    import xlrd
+    book = xlrd.open_workbook(filepath, on_demand=True)
+    try:
+        sheet = book.sheet_by_name(sheet_name) if sheet_name else book.sheet_by_index(0)
+        for i in range(sheet.nrows):
+            yield [None if value == "" else value for value in sheet.row_values(i)]
+    finally:
+        book.release_resources()
+
+
+def _make_columns(header):
+    """生成列名：空列名使用 Unnamed: i，重复列名追加序号（与 pandas 一致）"""
+    columns = []
+    seen = {}
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def read_excel_streaming(filepath, sheet_name=None, progress=None, cancel_event=None):
+    """以只读流式方式逐行读取工作表，第一行作为表头"""
+    if filepath.endswith('.xls'):
+        rows = _iter_xls_rows(filepath, sheet_name)
+    else:
+        rows = _iter_xlsx_rows(filepath, sheet_name)
+
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+    columns = _make_columns(header)
+
+    chunks = []
+    buffer = []
+    row_count = 0
+    for row in rows:
+        buffer.append(tuple(row[:len(columns)]))
+        if len(buffer) >= EXCEL_CHUNK_ROWS:
+            if cancel_event is not None and cancel_event.is_set():
+                raise LoadCancelled()
+            chunks.append(pd.DataFrame.from_records(buffer, columns=columns))
+            row_count += len(buffer)
+            buffer = []
+            if progress:
+                progress(None, row_count)
+    if buffer:
+        chunks.append(pd.DataFrame.from_records(buffer, columns=columns))
+
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+
+    # 去掉末尾的空行，并将 None 统一为 NaN
+    non_empty = df.notna().any(axis=1)
+    if not non_empty.all():
+        df = df.iloc[:non_empty[::-1].idxmax() + 1] if non_empty.any() else df.iloc[:0]
+    return df.infer_objects().mask(df.isna())
+
+
+def file_digest(filepath):
+    """计算文件内容哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_paths(filepath, sheet_name):
+    """缓存文件路径：由文件内容哈希和工作表名决定"""
+    sheet_key = hashlib.blake2b(str(sheet_name).encode("utf-8"), digest_size=4).hexdigest()
+    base = Path(config.cache_dir) / f"{file_digest(filepath)}-{sheet_key}"
+    return base.with_suffix(".feather"), base.with_suffix(".pkl")
+
+
+def load_excel_cached(filepath, sheet_name=None, progress=None, cancel_event=None):
+    """读取工作表，优先使用按内容哈希缓存的二进制侧车文件
+
+    有 pyarrow 时缓存为 Feather，否则退回 pickle。
+    """
+    feather_path, pickle_path = _cache_paths(filepath, sheet_name)
+    try:
+        if feather_path.exists():
+            return pd.read_feather(feather_path)
+        if pickle_path.exists():
+            return pd.read_pickle(pickle_path)
+    except Exception as e:
+        print(f"Error reading Excel cache: {e}")
+
+    df = read_excel_streaming(filepath, sheet_name, progress, cancel_event)
+
+    try:
+        os.makedirs(config.cache_dir, exist_ok=True)
+        try:
+            df.to_feather(feather_path)
+        except Exception:
+            # 没有 pyarrow 或列类型无法转换为 Arrow 时退回 pickle
+            if feather_path.exists():
+                feather_path.unlink()
+            df.to_pickle(pickle_path)
+    except Exception as e:
+        print(f"Error writing Excel cache: {e}")
+    return df
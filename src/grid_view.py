@@ -0,0 +1,211 @@
+import tkinter as tk
+from tkinter import ttk
+
+# 表格中单元格显示的最大字符数
+GRID_CELL_CHARS = 80
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualGrid(ttk.Frame):
+    """虚拟化的多行表格视图
+
+    只为可见的行创建 Treeview 条目，滚动时复用这些条目并按需从会话读取记录，
+    因此任意行数的表格都能流畅滚动。双击标注列可直接编辑标注。
+    选中状态以全局行号保存，按住 Shift 单击或按方向键可选中连续的多行（可超出可见范围）。
+    """
+
+    def __init__(self, parent, session, on_label_changed=None):
+        super().__init__(parent)
+        self.session = session
+        self.on_label_changed = on_label_changed
+        self.columns = session.display_columns + [session.label_column]
+        self.top = 0
+        self.visible_rows = 0
+        self.editor = None
+        # 选中区域为 anchor 到 cursor 之间的行（全局行号）
+        self.anchor = None
+        self.cursor = None
+        self.render_pending = None
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show="headings", selectmode="extended")
+        for col in self.columns:
+            self.tree.heading(col, text=str(col))
+            self.tree.column(col, width=120, stretch=False)
+
+        self.vscroll = ttk.Scrollbar(self, orient="vertical", command=self.on_scroll)
+        xscroll = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=xscroll.set)
+
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vscroll.grid(row=0, column=1, sticky="ns")
+        xscroll.grid(row=1, column=0, sticky="ew")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.row_height = int(ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_by(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(1, "units"))
+        self.tree.bind("<Button-1>", lambda e: self.on_click(e, extend=False))
+        self.tree.bind("<Shift-Button-1>", lambda e: self.on_click(e, extend=True))
+        self.tree.bind("<Double-1>", self.on_double_click)
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self.move_selection(1))
+        self.tree.bind("<Shift-Up>", lambda e: self.move_selection(-1, extend=True))
+        self.tree.bind("<Shift-Down>", lambda e: self.move_selection(1, extend=True))
+        self.tree.bind("<Prior>", lambda e: self.move_selection(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self.move_selection(self.visible_rows))
+
+    def on_resize(self, event):
+        """窗口大小变化时重新计算可见行数"""
+        # 减去表头高度
+        visible = max((event.height - self.row_height) // self.row_height, 1)
+        if visible != self.visible_rows:
+            self.visible_rows = visible
+            self.tree.delete(*self.tree.get_children())
+            for i in range(visible):
+                self.tree.insert("", "end", iid=str(i))
+            self.render()
+
+    def on_scroll(self, action, amount, unit=None):
+        """滚动条回调：moveto 或 scroll"""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.session)))
+        else:
+            self.scroll_by(int(amount), unit)
+
+    def scroll_by(self, amount, unit):
+        step = self.visible_rows if unit == "pages" else 3
+        self.scroll_to(self.top + amount * step)
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.session) - self.visible_rows))
+        if top != self.top:
+            self.top = top
+            self.close_editor()
+            self.schedule_render()
+
+    def show_row(self, index, extend=False):
+        """滚动到使指定行可见并选中；extend 为 True 时从 anchor 扩展选中区域"""
+        self.cursor = index
+        if not extend or self.anchor is None:
+            self.anchor = index
+        if not self.top <= index < self.top + self.visible_rows:
+            self.scroll_to(index - self.visible_rows // 2)
+        self.schedule_render()
+
+    def move_selection(self, delta, extend=False):
+        """键盘移动选中行，超出可见范围时滚动"""
+        index = self.selected_index()
+        index = 0 if index is None else max(0, min(index + delta, len(self.session) - 1))
+        self.show_row(index, extend)
+        return "break"
+
+    def on_click(self, event, extend):
+        """单击选中一行，Shift+单击选中连续多行；表头和列分隔线交给 Treeview 默认处理"""
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None
+        iid = self.tree.identify_row(event.y)
+        if not iid or self.top + int(iid) >= len(self.session):
+            return "break"
+        self.tree.focus_set()
+        self.show_row(self.top + int(iid), extend)
+        return "break"
+
+    def row_values(self, index):
+        # 使用缓存的截断预览，避免每次滚动都处理超长的单元格
+        record = self.session.get_preview(index)
+        values = []
+        for col in self.session.display_columns:
+            text = record.get(col, "")[:GRID_CELL_CHARS + 1].replace("\n", " ")
+            if len(text) > GRID_CELL_CHARS:
+                text = text[:GRID_CELL_CHARS] + "…"
+            values.append(text)
+        values.append(self.session.get_label(index))
+        return values
+
+    def schedule_render(self):
+        """合并连续的滚动和移动请求：空闲时只刷新一次可见行"""
+        if self.render_pending is None:
+            self.render_pending = self.after_idle(self.flush_render)
+
+    def flush_render(self):
+        self.render_pending = None
+        if self.winfo_exists():
+            self.render()
+
+    def render(self):
+        """只刷新可见行"""
+        total = len(self.session)
+        for i in range(self.visible_rows):
+            index = self.top + i
+            if index < total:
+                self.tree.item(str(i), values=self.row_values(index))
+            else:
+                self.tree.item(str(i), values=())
+
+        if total:
+            self.vscroll.set(self.top / total, min(self.top + self.visible_rows, total) / total)
+
+        # 只高亮选中区域中可见的行
+        selected = self.selected_range()
+        if selected is None:
+            self.tree.selection_set(())
+        else:
+            start, stop = max(selected[0], self.top), min(selected[1], self.top + self.visible_rows, total)
+            self.tree.selection_set([str(index - self.top) for index in range(start, stop)])
+
+    def selected_index(self):
+        """当前选中行（光标所在行）的全局行号"""
+        if self.cursor is None or self.cursor >= len(self.session):
+            return None
+        return self.cursor
+
+    def selected_range(self):
+        """选中区域 (起始行, 结束行)，不含结束行；没有选中时返回 None"""
+        if self.cursor is None:
+            return None
+        return min(self.anchor, self.cursor), max(self.anchor, self.cursor) + 1
+
+    def on_double_click(self, event):
+        """双击标注列时在单元格上显示编辑框"""
+        iid = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x)
+        if not iid or column != f"#{len(self.columns)}":
+            return
+
+        index = self.top + int(iid)
+        if index >= len(self.session):
+            return
+        bbox = self.tree.bbox(iid, column)
+        if not bbox:
+            return
+
+        self.close_editor()
+        var = tk.StringVar(value=self.session.get_label(index))
+        if self.session.label_type == "categorical":
+            self.editor = ttk.Combobox(self.tree, textvariable=var,
+                                       values=[""] + self.session.label_options, state="readonly")
+            self.editor.bind("<<ComboboxSelected>>", lambda e: self.commit_edit(index, var.get()))
+        else:
+            self.editor = ttk.Entry(self.tree, textvariable=var)
+            self.editor.bind("<Return>", lambda e: self.commit_edit(index, var.get()))
+            self.editor.bind("<FocusOut>", lambda e: self.commit_edit(index, var.get()))
+        self.editor.bind("<Escape>", lambda e: self.close_editor())
+
+        x, y, width, height = bbox
+        self.editor.place(x=x, y=y, width=width, height=height)
+        self.editor.focus_set()
+
+    def commit_edit(self, index, value):
+        self.close_editor()
+        if self.session.set_label(value, index) and self.on_label_changed:
+            self.on_label_changed()
+        self.render()
+
+    def close_editor(self):
+        if self.editor is not None:
+            editor, self.editor = self.editor, None
+            editor.destroy()
@@ -1,13 +1,31 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from tkinter.font import Font
-import pandas as pd
+import importlib
 import time
 from datetime import datetime
 from .config import config
-from .utils import load_data_file, save_annotated_data, validate_record_number, show_message
+from .instrumentation import instrumentation, timed
+from .grid_view import VirtualGrid
+from .dataset_paths import list_shards, dataset_size, is_sharded_path
+from .session_state import load_last_state, remember_session
+from .writers import available_formats
+from .utils import load_data_file, validate_record_number, show_message, format_file_size
 import os
-from threading import Thread
+from threading import Thread, Event
+
+# 启动后在后台预先导入的模块：数据处理依赖（numpy、pandas、Excel 读取库）只在加载文件后才用到，
+# 语言和文件选择界面不需要等待它们
+WARM_MODULES = ["numpy", "pandas", ".session", ".excel_reader", ".shared_store", "openpyxl", "xlrd"]
+
+
+def warm_imports():
+    """依次导入 WARM_MODULES，之后用到时直接从缓存中取得"""
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name, __package__)
+        except ImportError as e:
+            print(f"Error preloading {name}: {e}")
 
 
 class DataAnnotationApp:
@@ -21,19 +39,28 @@ class DataAnnotationApp:
         self.setup_styles()
 
         # 初始化变量
-        self.df = None
-        self.current_record = 0
-        self.unsaved_changes = False
-        self.save_reminder_active = False
+        self.source = None
+        self.session = None
+        self.view_mode = None
+        # 单条视图中标注输入控件对应的记录，以及尚未执行的界面刷新
+        self.displayed_record = None
+        self.update_pending = None
+        self.save_in_progress = False
+        self.export_format = "csv"
         self.label_column = None
         self.label_type = None
         self.label_options = []
+        # 正在恢复的上次会话（session_state.load_last_state 的结果）
+        self.resume_state = None
+
+        # 用户选择语言和文件时在后台导入数据处理依赖
+        Thread(target=warm_imports, daemon=True).start()
 
         # 创建语言选择界面
         self.create_language_selection()
 
-        # 设置保存提醒
-        self.setup_save_reminder()
+        # 自动保存状态
+        self.setup_autosave_status()
 
         # 窗口关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -97,6 +124,30 @@ class DataAnnotationApp:
         )
         chinese_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
 
+        # 上次的会话仍然有效时可以直接恢复，跳过文件和标注设置
+        last_state = load_last_state()
+        if last_state is not None:
+            resume_btn = ttk.Button(
+                frame,
+                text=config.get("resume_session").format(
+                    os.path.basename(last_state["source"].rstrip("/\\")), last_state["current_record"] + 1
+                ),
+                command=lambda: self.resume_session(last_state)
+            )
+            resume_btn.pack(pady=10, ipadx=20, ipady=10)
+
+    def resume_session(self, state):
+        """恢复上次的会话：按保存的设置重新打开数据源，加载完成后直接进入标注界面"""
+        config.set_language(state.get("language", config.current_language))
+        self.resume_state = state
+        self.filepath = state["source"]
+        self.sheet_name = state.get("sheet_name")
+        self.compact_load_var = tk.BooleanVar(value=state.get("compact", False))
+        self.label_column = state["label_column"]
+        self.label_type = state["label_type"]
+        self.label_options = list(state["label_options"])
+        self.start_loading()
+
     def set_language(self, language):
         """设置语言并进入主界面"""
         config.set_language(language)
@@ -105,6 +156,7 @@ class DataAnnotationApp:
     def create_file_selection(self):
         """创建文件选择界面"""
         self.clear_window()
+        self.resume_state = None
 
         frame = ttk.Frame(self.root, padding=20)
         frame.pack(expand=True, fill="both")
@@ -122,6 +174,14 @@ class DataAnnotationApp:
         file_label = ttk.Label(frame, textvariable=self.file_path_var, wraplength=600)
         file_label.pack(pady=10)
 
+        self.compact_load_var = tk.BooleanVar(value=config.compact_load)
+        compact_check = ttk.Checkbutton(
+            frame,
+            text=config.get("compact_load"),
+            variable=self.compact_load_var
+        )
+        compact_check.pack(pady=5)
+
         browse_btn = ttk.Button(
             btn_frame,
             text=config.get("select_file"),
@@ -129,6 +189,13 @@ class DataAnnotationApp:
         )
         browse_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
 
+        folder_btn = ttk.Button(
+            btn_frame,
+            text=config.get("select_folder"),
+            command=self.browse_folder
+        )
+        folder_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
+
         next_btn = ttk.Button(
             btn_frame,
             text=config.get("next"),
@@ -156,19 +223,196 @@ class DataAnnotationApp:
             self.filepath = filepath
             self.next_btn["state"] = "normal"
 
+    def browse_folder(self):
+        """选择分片CSV所在的目录，作为一个数据集打开"""
+        folder = filedialog.askdirectory(title=config.get("select_folder"))
+        if not folder:
+            return
+
+        shards = list_shards(folder)
+        if not shards:
+            show_message(config.get("error"), config.get("no_shards_found"), "error")
+            return
+
+        self.file_path_var.set(
+            f"{config.get('file_selected')} {folder} {config.get('shard_count').format(len(shards))}"
+        )
+        self.filepath = os.path.normpath(folder)
+        self.next_btn["state"] = "normal"
+
     def validate_and_proceed(self):
-        """验证文件并进入下一步"""
-        self.df, error = load_data_file(self.filepath)
+        """验证文件：多工作表的Excel先选择工作表，再开始加载"""
+        self.sheet_name = None
+        if self.filepath.endswith(('.xlsx', '.xls')):
+            from .excel_reader import list_excel_sheets
+            try:
+                sheets = list_excel_sheets(self.filepath)
+            except Exception as e:
+                print(f"Error listing sheets: {e}")
+                show_message(config.get("error"), config.get("invalid_file_msg"), "error")
+                return
+
+            if len(sheets) > 1:
+                self.show_sheet_selection(sheets)
+                return
+            self.sheet_name = sheets[0] if sheets else None
+
+        self.start_loading()
+
+    def show_sheet_selection(self, sheets):
+        """显示工作表选择界面"""
+        self.clear_window()
+
+        frame = ttk.Frame(self.root, padding=20)
+        frame.pack(expand=True, fill="both")
+
+        title = ttk.Label(frame, text=config.get("select_sheet"), style="Header.TLabel")
+        title.pack(pady=10)
+
+        self.sheet_var = tk.StringVar()
+        combobox = ttk.Combobox(frame, textvariable=self.sheet_var, values=sheets, state="readonly")
+        combobox.pack(pady=10, fill="x")
+        combobox.current(0)
+
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(pady=20)
+
+        back_btn = ttk.Button(
+            btn_frame,
+            text=config.get("back"),
+            command=self.create_file_selection
+        )
+        back_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
+
+        next_btn = ttk.Button(
+            btn_frame,
+            text=config.get("next"),
+            command=self.process_sheet_selection
+        )
+        next_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
+
+    def process_sheet_selection(self):
+        """处理工作表选择"""
+        self.sheet_name = self.sheet_var.get()
+        self.start_loading()
+
+    def start_loading(self):
+        """在后台线程中加载文件并显示进度"""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+
+        self.load_cancel_event = Event()
+        self.load_progress = (0, 0)
+        self.load_result = None
+        self.load_start_time = time.perf_counter()
+        config.compact_load = self.compact_load_var.get()
+        self.show_loading_screen()
+
+        def load_thread():
+            def progress(bytes_read, rows):
+                # 只记录最新进度，由主线程通过 after 轮询刷新界面
+                self.load_progress = (bytes_read, rows)
+
+            self.load_result = load_data_file(
+                self.filepath, progress, self.load_cancel_event, self.sheet_name, config.compact_load
+            )
+
+        Thread(target=load_thread, daemon=True).start()
+        self.root.after(100, self.poll_loading)
+
+    def show_loading_screen(self):
+        """显示加载进度界面"""
+        self.clear_window()
+
+        frame = ttk.Frame(self.root, padding=20)
+        frame.pack(expand=True, fill="both")
+
+        title = ttk.Label(frame, text=config.get("loading"), style="Header.TLabel")
+        title.pack(pady=10)
+
+        file_label = ttk.Label(frame, text=self.filepath, wraplength=600)
+        file_label.pack(pady=5)
+
+        self.load_total_bytes = dataset_size(self.filepath)
+        # 只有CSV（包括分片数据集）能按字节报告进度，其他格式显示不确定进度
+        determinate = self.filepath.endswith('.csv') or is_sharded_path(self.filepath)
+        self.load_progressbar = ttk.Progressbar(
+            frame,
+            mode="determinate" if determinate else "indeterminate",
+            maximum=max(self.load_total_bytes, 1),
+            length=500
+        )
+        self.load_progressbar.pack(pady=10)
+        if not determinate:
+            self.load_progressbar.start(20)
+
+        self.load_status_label = ttk.Label(frame, text="")
+        self.load_status_label.pack(pady=5)
+
+        cancel_btn = ttk.Button(
+            frame,
+            text=config.get("cancel"),
+            command=self.load_cancel_event.set
+        )
+        cancel_btn.pack(pady=20, ipadx=20, ipady=10)
+
+    def poll_loading(self):
+        """轮询加载线程的进度和结果"""
+        if self.load_result is None:
+            bytes_read, rows = self.load_progress
+            elapsed = max(time.perf_counter() - self.load_start_time, 1e-6)
+            if bytes_read is None:
+                # Excel 只能报告已读行数
+                status = config.get("load_rows_progress").format(f"{rows:,}", f"{rows / elapsed:,.0f}")
+            else:
+                self.load_progressbar["value"] = bytes_read
+                status = config.get("load_progress").format(
+                    format_file_size(bytes_read),
+                    format_file_size(self.load_total_bytes),
+                    f"{rows:,}",
+                    f"{rows / elapsed:,.0f}"
+                )
+            self.load_status_label.config(text=status)
+            self.root.after(100, self.poll_loading)
+            return
+
+        self.source, error = self.load_result
+        self.load_result = None
+
+        if self.load_cancel_event.is_set():
+            if self.source is not None:
+                self.source.close()
+                self.source = None
+            self.create_file_selection()
+            return
 
         if error:
             show_message(config.get("error"), error, "error")
+            self.create_file_selection()
+            return
+
+        instrumentation.set_context(
+            file=self.filepath,
+            file_bytes=self.load_total_bytes,
+            rows=len(self.source),
+            columns=len(self.source.columns),
+            compact_load=config.compact_load,
+            load_seconds=time.perf_counter() - self.load_start_time
+        )
+
+        if self.resume_state is not None:
+            self.start_annotation()
             return
 
         # 检查列数是否过多
-        if len(self.df.columns) > 10:
+        if len(self.source.columns) > 10:
             show_message(
                 config.get("warning"),
-                config.get("max_columns_warning").format(len(self.df.columns)),
+                config.get("max_columns_warning").format(len(self.source.columns)),
                 "warning"
             )
 
@@ -188,19 +432,23 @@ class DataAnnotationApp:
         stats_frame = ttk.Frame(frame)
         stats_frame.pack(fill="x", pady=10)
 
-        rows_label = ttk.Label(stats_frame, text=f"{config.get('total_rows')} {len(self.df)}")
+        rows_label = ttk.Label(stats_frame, text=f"{config.get('total_rows')} {len(self.source)}")
         rows_label.pack(anchor="w")
 
-        cols_label = ttk.Label(stats_frame, text=f"{config.get('total_columns')} {len(self.df.columns)}")
+        cols_label = ttk.Label(stats_frame, text=f"{config.get('total_columns')} {len(self.source.columns)}")
         cols_label.pack(anchor="w")
 
         cols_names_label = ttk.Label(
             stats_frame,
-            text=f"{config.get('column_names')} {', '.join(self.df.columns)}",
+            text=f"{config.get('column_names')} {', '.join(map(str, self.source.columns))}",
             wraplength=600
         )
         cols_names_label.pack(anchor="w", pady=10)
 
+        # 紧凑加载时显示每列压缩前后的内存占用
+        if self.source.memory_report:
+            self.show_memory_report(frame, self.source.memory_report)
+
         # 按钮框架
         btn_frame = ttk.Frame(frame)
         btn_frame.pack(pady=20)
@@ -219,6 +467,33 @@ class DataAnnotationApp:
         )
         next_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
 
+    def show_memory_report(self, parent, report):
+        """显示每列内存占用报告"""
+        total_before = sum(row[3] for row in report)
+        total_after = sum(row[4] for row in report)
+
+        total_label = ttk.Label(
+            parent,
+            text=f"{config.get('memory_usage')}{format_file_size(total_before)} → {format_file_size(total_after)}"
+        )
+        total_label.pack(anchor="w")
+
+        columns = ("column", "type", "before", "after")
+        tree = ttk.Treeview(parent, columns=columns, show="headings", height=min(len(report), 8))
+        tree.heading("column", text=config.get("memory_column"))
+        tree.heading("type", text=config.get("memory_type"))
+        tree.heading("before", text=config.get("memory_before"))
+        tree.heading("after", text=config.get("memory_after"))
+
+        for col_name, dtype_before, dtype_after, bytes_before, bytes_after in report:
+            tree.insert("", "end", values=(
+                col_name,
+                f"{dtype_before} → {dtype_after}",
+                format_file_size(bytes_before),
+                format_file_size(bytes_after)
+            ))
+        tree.pack(fill="x", pady=5)
+
     def setup_label_column(self):
         """设置标注列"""
         self.clear_window()
@@ -284,7 +559,7 @@ class DataAnnotationApp:
         title.pack(pady=10)
 
         self.label_column_var = tk.StringVar()
-        columns = list(self.df.columns)
+        columns = list(self.source.columns)
 
         combobox = ttk.Combobox(frame, textvariable=self.label_column_var, values=columns)
         combobox.pack(pady=10, fill="x")
@@ -347,8 +622,7 @@ class DataAnnotationApp:
             show_message(config.get("error"), config.get("filename_required"), "error")
             return
 
-        # 添加新列
-        self.df[label_name] = ""
+        # 新列的值保存在独立的标注数组中，导出时再写入
         self.label_column = label_name
         self.process_label_type()
 
@@ -513,6 +787,9 @@ class DataAnnotationApp:
                              f"{config.get('option')} {len(self.label_options) + 1} {config.get('filename_required')}",
                              "error")
                 return
+            if option in self.label_options:
+                show_message(config.get("error"), config.get("duplicate_option").format(option), "error")
+                return
             self.label_options.append(option)
 
         self.start_annotation()
@@ -521,12 +798,55 @@ class DataAnnotationApp:
         """开始标注"""
         self.clear_window()
 
-        # 初始化当前记录
-        self.current_record = 0
+        # 创建标注会话，恢复上次的会话时回到上次的位置
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        state, self.resume_state = self.resume_state, None
+
+        from .session import AnnotationSession
+        from .shared_store import SharedAnnotationStore
+
+        # 多人模式：打开共享标注库，标注从自己租用的行开始
+        shared_store = None
+        if config.shared_store:
+            try:
+                shared_store = SharedAnnotationStore(
+                    config.shared_store, config.annotator, len(self.source), self.label_column
+                )
+            except Exception as e:
+                print(f"Error opening shared store: {e}")
+                show_message(config.get("error"), config.get("shared_store_error").format(e), "error")
+                self.setup_label_column()
+                return
 
-        # 如果是新列，初始化空值
-        if self.has_label_var.get() == "no":
-            self.df[self.label_column] = ""
+        self.session = AnnotationSession(
+            self.source,
+            self.filepath,
+            self.label_column,
+            self.label_type,
+            self.label_options,
+            new_column=state["new_column"] if state is not None else self.has_label_var.get() == "no",
+            shared_store=shared_store,
+            state=state,
+            load_options={"sheet_name": self.sheet_name, "compact": config.compact_load}
+        )
+        remember_session(self.filepath)
+
+        # 数据源在日志写入后被修改过：日志没有重放，提示用户旧日志的位置
+        if self.session.journal.stale_path:
+            show_message(
+                config.get("warning"),
+                config.get("journal_stale").format(self.session.journal.stale_path),
+                "warning"
+            )
+
+        restored = self.session.restored_edits
+        self.journal_status = config.get("journal_restored").format(restored) if restored else ""
+        if self.session.resumed:
+            self.journal_status = config.get("session_resumed").format(self.session.current_record + 1)
+        if shared_store is not None:
+            self.journal_status = config.get("shared_mode").format(config.annotator)
 
         # 创建主界面
         self.create_annotation_interface()
@@ -534,6 +854,7 @@ class DataAnnotationApp:
     def create_annotation_interface(self):
         """创建标注界面"""
         self.clear_window()
+        self.view_mode = "record"
 
         # 主框架
         main_frame = ttk.Frame(self.root)
@@ -546,15 +867,50 @@ class DataAnnotationApp:
         title = ttk.Label(title_frame, text=config.get("annotation_title"), style="Header.TLabel")
         title.pack(side="left")
 
+        grid_btn = ttk.Button(
+            title_frame,
+            text=config.get("grid_view"),
+            command=self.create_grid_interface
+        )
+        grid_btn.pack(side="right", padx=5)
+
+        self.status_label = ttk.Label(title_frame, text=self.journal_status)
+        self.status_label.pack(side="right", padx=10)
+
         # 记录导航
         nav_frame = ttk.Frame(main_frame)
         nav_frame.pack(fill="x", pady=10)
 
-        self.record_label = ttk.Label(
+        self.record_label = ttk.Label(nav_frame, text=self.record_text())
+        self.record_label.pack(side="left", padx=10)
+
+        self.progress_label = ttk.Label(nav_frame, text=self.progress_text())
+        self.progress_label.pack(side="left", padx=10)
+
+        self.rate_label = ttk.Label(nav_frame, text=self.rate_text())
+        self.rate_label.pack(side="left", padx=10)
+
+        # 跳转到未标注记录
+        prev_unlabeled_btn = ttk.Button(
             nav_frame,
-            text=f"{config.get('record_num')}{self.current_record + 1}{config.get('of')}{len(self.df)}"
+            text=config.get("prev_unlabeled"),
+            command=self.prev_unlabeled_record
         )
-        self.record_label.pack(side="left", padx=10)
+        prev_unlabeled_btn.pack(side="left", padx=5)
+
+        next_unlabeled_btn = ttk.Button(
+            nav_frame,
+            text=config.get("next_unlabeled"),
+            command=self.next_unlabeled_record
+        )
+        next_unlabeled_btn.pack(side="left", padx=5)
+
+        bulk_btn = ttk.Button(
+            nav_frame,
+            text=config.get("bulk_label"),
+            command=self.show_bulk_label
+        )
+        bulk_btn.pack(side="left", padx=5)
 
         # 跳转记录
         jump_frame = ttk.Frame(nav_frame)
@@ -573,6 +929,32 @@ class DataAnnotationApp:
         )
         jump_btn.pack(side="left", padx=5)
 
+        # 关键词搜索
+        search_frame = ttk.Frame(main_frame)
+        search_frame.pack(fill="x")
+
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side="left", fill="x", expand=True, padx=10)
+        search_entry.bind("<Return>", lambda e: self.search_records())
+
+        search_btn = ttk.Button(
+            search_frame,
+            text=config.get("search"),
+            command=self.search_records
+        )
+        search_btn.pack(side="left", padx=5)
+
+        clear_btn = ttk.Button(
+            search_frame,
+            text=config.get("clear_search"),
+            command=self.clear_search
+        )
+        clear_btn.pack(side="left", padx=5)
+
+        self.search_label = ttk.Label(search_frame, text="")
+        self.search_label.pack(side="left", padx=10)
+
         # 数据展示
         data_frame = ttk.LabelFrame(main_frame, text="Data", padding=10)
         data_frame.pack(fill="both", expand=True, pady=10)
@@ -594,9 +976,11 @@ class DataAnnotationApp:
 
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
+        self.data_canvas = canvas
 
         # 显示当前记录
-        self.display_record(scrollable_frame)
+        self.create_record_view(scrollable_frame)
+        self.display_record()
 
         # 导航按钮
         btn_frame = ttk.Frame(main_frame)
@@ -606,14 +990,14 @@ class DataAnnotationApp:
             btn_frame,
             text=config.get("prev"),
             command=self.prev_record,
-            state="disabled" if self.current_record == 0 else "normal"
+            state="normal" if self.session.has_prev() else "disabled"
         )
         self.prev_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
 
         save_btn = ttk.Button(
             btn_frame,
             text=config.get("save_now"),
-            command=self.save_data
+            command=self.save_journal
         )
         save_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
 
@@ -621,7 +1005,7 @@ class DataAnnotationApp:
             btn_frame,
             text=config.get("next_record"),
             command=self.next_record,
-            state="disabled" if self.current_record == len(self.df) - 1 else "normal"
+            state="normal" if self.session.has_next() else "disabled"
         )
         self.next_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
 
@@ -632,129 +1016,477 @@ class DataAnnotationApp:
         )
         finish_btn.pack(side="right", padx=10, ipadx=20, ipady=10)
 
-    def display_record(self, parent_frame):
-        """显示当前记录"""
-        # 清除之前的显示
-        for widget in parent_frame.winfo_children():
-            widget.destroy()
-
-        # 获取当前记录
-        record = self.df.iloc[self.current_record]
+        # 键盘快捷键：分类标注时焦点放在窗口上，文本标注时焦点放在输入框中
+        self.root.bind("<Key>", self.on_key)
+        if self.label_entry is not None:
+            self.label_entry.focus_set()
+        else:
+            self.root.focus_set()
 
-        # 显示每个字段
-        for i, (col_name, value) in enumerate(record.items()):
-            if col_name == self.label_column:
-                continue
+    def create_record_view(self, parent_frame):
+        """创建记录视图：每列只创建一次标签，切换记录时只更新文本"""
+        self.value_labels = {}
+        # 内容被截断的列显示"展开"按钮
+        self.expand_buttons = {}
 
+        for col_name in self.session.display_columns:
             field_frame = ttk.Frame(parent_frame)
             field_frame.pack(fill="x", pady=5)
 
             name_label = ttk.Label(field_frame, text=f"{col_name}:", width=20, anchor="e")
             name_label.pack(side="left", padx=5)
 
-            value_label = ttk.Label(field_frame, text=str(value), wraplength=400, anchor="w")
+            value_label = ttk.Label(field_frame, text="", wraplength=400, anchor="w")
             value_label.pack(side="left", fill="x", expand=True)
+            self.value_labels[col_name] = value_label
+
+            self.expand_buttons[col_name] = ttk.Button(
+                field_frame,
+                text=config.get("expand"),
+                command=lambda col=col_name: self.show_full_value(col)
+            )
 
         # 添加标注区域
         label_frame = ttk.Frame(parent_frame)
         label_frame.pack(fill="x", pady=10)
 
-        name_label = ttk.Label(label_frame, text=f"{self.label_column}:", width=20, anchor="e")
+        name_label = ttk.Label(label_frame, text=f"{self.session.label_column}:", width=20, anchor="e")
         name_label.pack(side="left", padx=5)
 
-        if self.label_type == "categorical":
-            self.label_var = tk.StringVar(value=record[self.label_column])
+        self.label_var = tk.StringVar()
+        self.label_entry = None
 
-            for option in self.label_options:
+        if self.session.label_type == "categorical":
+            for i, option in enumerate(self.session.label_options):
+                # 前9个选项可以用数字键选择
                 rb = ttk.Radiobutton(
                     label_frame,
-                    text=option,
+                    text=f"{i + 1}. {option}" if i < 9 else option,
                     variable=self.label_var,
                     value=option
                 )
                 rb.pack(anchor="w", padx=5, pady=2)
+            hint = config.get("hotkey_hint_categorical")
+        else:
+            self.label_entry = ttk.Entry(label_frame, textvariable=self.label_var)
+            self.label_entry.pack(fill="x", expand=True)
+            hint = config.get("hotkey_hint_text")
+
+        hint_label = ttk.Label(parent_frame, text=hint, foreground="gray")
+        hint_label.pack(anchor="w", padx=5)
+
+    def create_grid_interface(self):
+        """创建表格视图：多行同时显示，可在表格中直接编辑标注"""
+        self.save_current_label()
+        self.clear_window()
+        self.view_mode = "grid"
+
+        main_frame = ttk.Frame(self.root)
+        main_frame.pack(expand=True, fill="both", padx=10, pady=10)
+
+        title_frame = ttk.Frame(main_frame)
+        title_frame.pack(fill="x", pady=5)
+
+        title = ttk.Label(title_frame, text=config.get("annotation_title"), style="Header.TLabel")
+        title.pack(side="left")
+
+        self.progress_label = ttk.Label(title_frame, text=self.progress_text())
+        self.progress_label.pack(side="left", padx=10)
+
+        record_btn = ttk.Button(
+            title_frame,
+            text=config.get("record_view"),
+            command=self.close_grid_interface
+        )
+        record_btn.pack(side="right", padx=5)
+
+        bulk_btn = ttk.Button(
+            title_frame,
+            text=config.get("label_selection"),
+            command=self.label_grid_selection
+        )
+        bulk_btn.pack(side="right", padx=5)
+
+        export_btn = ttk.Button(
+            title_frame,
+            text=config.get("finish_annotation"),
+            command=self.finish_annotation
+        )
+        export_btn.pack(side="right", padx=5)
+
+        self.status_label = ttk.Label(title_frame, text=self.journal_status)
+        self.status_label.pack(side="right", padx=10)
+
+        self.grid_view = VirtualGrid(
+            main_frame,
+            self.session,
+            on_label_changed=lambda: self.progress_label.config(text=self.progress_text())
+        )
+        self.grid_view.pack(expand=True, fill="both", pady=10)
+        self.grid_view.after_idle(lambda: self.grid_view.show_row(self.session.current_record))
+
+    def close_grid_interface(self):
+        """从表格视图返回单条视图，定位到选中的行"""
+        index = self.grid_view.selected_index()
+        if index is not None:
+            self.session.go_to(index)
+        self.create_annotation_interface()
+
+    def label_grid_selection(self):
+        """为表格视图中选中的行批量设置标注"""
+        selection = self.grid_view.selected_range()
+        if selection is None:
+            show_message(config.get("error"), config.get("no_selection"), "error")
+            return
+        self.session.go_to(self.grid_view.selected_index())
+        self.show_bulk_label(selection)
+
+    def show_bulk_label(self, selection=None):
+        """批量标注界面：为一段记录、全部搜索结果或表格中选中的行设置同一个标注"""
+        self.save_current_label()
+        self.bulk_return = self.view_mode
+        self.bulk_selection = selection
+        self.view_mode = "bulk"
+        self.clear_window()
+
+        frame = ttk.Frame(self.root, padding=20)
+        frame.pack(expand=True, fill="both")
+
+        title = ttk.Label(frame, text=config.get("bulk_label_title"), style="Header.TLabel")
+        title.pack(pady=10)
+
+        # 标注范围
+        self.bulk_scope = tk.StringVar(value="selection" if selection else "range")
+
+        if selection:
+            rb = ttk.Radiobutton(
+                frame,
+                text=config.get("bulk_scope_selection").format(selection[0] + 1, selection[1]),
+                variable=self.bulk_scope,
+                value="selection"
+            )
+            rb.pack(anchor="w", pady=5)
+
+        range_frame = ttk.Frame(frame)
+        range_frame.pack(anchor="w", pady=5)
+
+        rb = ttk.Radiobutton(
+            range_frame,
+            text=config.get("bulk_scope_range"),
+            variable=self.bulk_scope,
+            value="range"
+        )
+        rb.pack(side="left")
+
+        self.bulk_from_entry = ttk.Entry(range_frame, width=10)
+        self.bulk_from_entry.insert(0, str(self.session.current_record + 1))
+        self.bulk_from_entry.pack(side="left", padx=5)
+
+        to_label = ttk.Label(range_frame, text=config.get("bulk_scope_to"))
+        to_label.pack(side="left", padx=5)
+
+        self.bulk_to_entry = ttk.Entry(range_frame, width=10)
+        self.bulk_to_entry.insert(0, str(len(self.session)))
+        self.bulk_to_entry.pack(side="left", padx=5)
+
+        if self.session.filter_rows is not None:
+            rb = ttk.Radiobutton(
+                frame,
+                text=config.get("bulk_scope_filter").format(f"{len(self.session.filter_rows):,}"),
+                variable=self.bulk_scope,
+                value="filter"
+            )
+            rb.pack(anchor="w", pady=5)
+
+        # 标注值
+        value_frame = ttk.Frame(frame)
+        value_frame.pack(anchor="w", pady=10)
+
+        value_label = ttk.Label(value_frame, text=config.get("bulk_value"))
+        value_label.pack(side="left", padx=5)
+
+        self.bulk_value_var = tk.StringVar(value=self.session.get_label())
+        if self.session.label_type == "categorical":
+            value_input = ttk.Combobox(
+                value_frame,
+                textvariable=self.bulk_value_var,
+                values=[""] + self.session.label_options,
+                state="readonly"
+            )
+        else:
+            value_input = ttk.Entry(value_frame, textvariable=self.bulk_value_var, width=40)
+        value_input.pack(side="left", padx=5)
+
+        # 按钮框架
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(pady=20)
+
+        back_btn = ttk.Button(
+            btn_frame,
+            text=config.get("back"),
+            command=self.close_bulk_label
+        )
+        back_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
+
+        apply_btn = ttk.Button(
+            btn_frame,
+            text=config.get("apply"),
+            command=self.process_bulk_label
+        )
+        apply_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
+
+    @timed("bulk_label")
+    def process_bulk_label(self):
+        """一次性为选定范围内的全部记录设置标注"""
+        scope = self.bulk_scope.get()
+        if scope == "range":
+            valid_from, start = validate_record_number(self.bulk_from_entry.get(), len(self.session))
+            valid_to, stop = validate_record_number(self.bulk_to_entry.get(), len(self.session))
+            if not valid_from or not valid_to:
+                show_message(config.get("error"), start if not valid_from else stop, "error")
+                return
+            if start > stop:
+                show_message(config.get("error"), config.get("bulk_range_invalid"), "error")
+                return
+            rows = slice(start - 1, stop)
+        elif scope == "filter":
+            rows = self.session.filter_rows
+        else:
+            rows = slice(*self.bulk_selection)
+
+        count = self.session.set_label_bulk(rows, self.bulk_value_var.get())
+        self.journal_status = config.get("bulk_applied").format(f"{count:,}")
+        self.close_bulk_label()
+
+    def close_bulk_label(self):
+        """返回进入批量标注前的视图"""
+        if self.bulk_return == "grid":
+            self.create_grid_interface()
         else:
-            self.label_var = tk.StringVar(value=record[self.label_column])
-            entry = ttk.Entry(label_frame, textvariable=self.label_var)
-            entry.pack(fill="x", expand=True)
+            self.create_annotation_interface()
+
+    @timed("display_record")
+    def display_record(self):
+        """显示当前记录"""
+        # 从预取缓存获取已转换并截断的预览，过长的内容不进入标签布局
+        record = self.session.get_record()
+        previews = self.session.get_preview()
+
+        for col_name, value_label in self.value_labels.items():
+            preview = previews.get(col_name, "")
+            value_label.config(text=preview)
+
+            expand_btn = self.expand_buttons[col_name]
+            if preview != record.get(col_name, ""):
+                if not expand_btn.winfo_ismapped():
+                    expand_btn.pack(side="right", padx=5, before=value_label)
+            else:
+                expand_btn.pack_forget()
+
+        self.label_var.set(self.session.get_label())
+        self.displayed_record = self.session.current_record
+
+    def show_full_value(self, col_name):
+        """在单独的窗口中用可滚动的文本框显示单元格的完整内容"""
+        text = self.session.get_record(self.displayed_record).get(col_name, "")
+
+        window = tk.Toplevel(self.root)
+        window.title(f"{col_name} - {config.get('record_num')}{self.displayed_record + 1}")
+        window.geometry("700x500")
+
+        text_widget = tk.Text(window, wrap="word")
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=text_widget.yview)
+        text_widget.configure(yscrollcommand=scrollbar.set)
+
+        scrollbar.pack(side="right", fill="y")
+        text_widget.pack(side="left", fill="both", expand=True)
+
+        text_widget.insert("1.0", text)
+        text_widget.config(state="disabled")
 
     def prev_record(self):
         """显示上一条记录"""
-        if self.current_record > 0:
+        if self.session.has_prev():
             self.save_current_label()
-            self.current_record -= 1
-            self.update_annotation_interface()
+            self.session.prev_record()
+            self.schedule_update()
 
     def next_record(self):
         """显示下一条记录"""
-        if self.current_record < len(self.df) - 1:
+        if self.session.has_next():
             self.save_current_label()
-            self.current_record += 1
-            self.update_annotation_interface()
+            self.session.next_record()
+            self.schedule_update()
+
+    def next_unlabeled_record(self):
+        """跳转到下一条未标注记录"""
+        self.save_current_label()
+        if self.session.next_unlabeled():
+            self.schedule_update()
+        else:
+            self.progress_label.config(text=self.progress_text())
+
+    def prev_unlabeled_record(self):
+        """跳转到上一条未标注记录"""
+        self.save_current_label()
+        if self.session.prev_unlabeled():
+            self.schedule_update()
+        else:
+            self.progress_label.config(text=self.progress_text())
+
+    def on_key(self, event):
+        """键盘快捷键：数字键选择分类标注并前进，方向键导航，文本标注按回车提交并前进"""
+        if self.view_mode != "record":
+            return None
+
+        keysym = event.keysym
+        if event.widget is self.label_entry:
+            if keysym in ("Return", "KP_Enter"):
+                self.commit_and_advance()
+                return "break"
+            # 输入框中左右键用于移动光标，上下键用于导航
+            if keysym == "Up":
+                self.prev_record()
+                return "break"
+            if keysym == "Down":
+                self.next_record()
+                return "break"
+            return None
+
+        # 搜索框、跳转框中的按键不作为快捷键
+        if isinstance(event.widget, (tk.Entry, tk.Text)):
+            return None
+
+        if keysym in ("Left", "Up"):
+            self.prev_record()
+            return "break"
+        if keysym in ("Right", "Down"):
+            self.next_record()
+            return "break"
+
+        options = self.session.label_options
+        if self.session.label_type == "categorical" and len(event.char) == 1 and event.char in "123456789":
+            index = int(event.char) - 1
+            if index < len(options):
+                self.choose_label(options[index])
+                return "break"
+        return None
+
+    @timed("choose_label")
+    def choose_label(self, value):
+        """快捷键选择标注：直接写入当前记录并前进到下一条"""
+        self.save_current_label()
+        self.session.set_label(value)
+        # 界面已显示当前记录时同步输入控件，避免之后被旧值覆盖
+        if self.displayed_record == self.session.current_record:
+            self.label_var.set(value)
+        self.advance()
+
+    @timed("commit_and_advance")
+    def commit_and_advance(self):
+        """提交输入框中的标注并前进到下一条"""
+        self.save_current_label()
+        self.advance()
+
+    def advance(self):
+        # 多人模式下前进到自己租用的下一条未标注记录
+        if self.session.shared is not None:
+            self.session.next_unlabeled()
+        elif self.session.has_next():
+            self.session.next_record()
+        self.schedule_update()
+
+    def rate_text(self):
+        """标注速度文字（条/分钟）"""
+        return config.get("records_per_minute").format(f"{self.session.throughput.per_minute():.0f}")
+
+    def record_text(self):
+        """记录位置文字，有搜索结果时附带在结果中的序号"""
+        text = f"{config.get('record_num')}{self.session.current_record + 1}{config.get('of')}{len(self.session)}"
+        position = self.session.filter_position()
+        if position is not None:
+            text += config.get("match_position").format(position, len(self.session.filter_rows))
+        return text
+
+    def search_records(self):
+        """按关键词过滤记录，上一条/下一条只在结果中移动"""
+        query = self.search_var.get().strip()
+        if not query:
+            self.clear_search()
+            return
+
+        self.save_current_label()
+        count = self.session.search(query)
+        if count is None and self.session.search_index.error:
+            self.search_label.config(text=config.get("search_failed").format(self.session.search_index.error))
+            return
+        if count is None:
+            self.search_label.config(
+                text=config.get("search_not_ready").format(f"{self.session.search_index.indexed_rows:,}")
+            )
+            return
+
+        self.search_label.config(text=config.get("search_results").format(f"{count:,}"))
+        self.schedule_update()
+
+    def clear_search(self):
+        """清除搜索过滤"""
+        self.search_var.set("")
+        self.search_label.config(text="")
+        self.session.clear_filter()
+        self.schedule_update()
+
+    def progress_text(self):
+        """标注进度文字"""
+        progress = self.session.progress
+        return config.get("labeled_progress").format(f"{progress.labeled_count:,}", f"{progress.size:,}")
 
     def jump_to_record(self):
         """跳转到指定记录"""
         input_str = self.jump_entry.get()
-        valid, result = validate_record_number(input_str, len(self.df))
+        valid, result = validate_record_number(input_str, len(self.session))
 
         if valid:
             self.save_current_label()
-            self.current_record = result - 1
-            self.update_annotation_interface()
+            self.session.go_to(result - 1)
+            self.schedule_update()
         else:
             show_message(config.get("error"), result, "error")
 
+    @timed("save_current_label")
     def save_current_label(self):
-        """保存当前记录的标注"""
-        current_label = self.label_var.get()
-        self.df.at[self.current_record, self.label_column] = current_label
+        """保存当前显示记录的标注"""
+        # 表格视图中的标注直接写入会话，没有单条视图的输入控件
+        if self.view_mode != "record" or self.displayed_record is None:
+            return
+        # 连续导航时界面可能尚未刷新，输入控件中仍是上一次显示的记录的标注
+        self.session.set_label(self.label_var.get(), self.displayed_record)
+
+    def schedule_update(self):
+        """合并连续的导航请求：空闲时只刷新一次，跳过中间经过的记录"""
+        if self.update_pending is None:
+            self.update_pending = self.root.after_idle(self.flush_update)
 
-        if not self.unsaved_changes and current_label != "":
-            self.unsaved_changes = True
+    def flush_update(self):
+        self.update_pending = None
+        if self.view_mode == "record":
+            self.update_annotation_interface()
 
+    @timed("update_annotation_interface")
     def update_annotation_interface(self):
         """更新标注界面"""
-        self.record_label.config(
-            text=f"{config.get('record_num')}{self.current_record + 1}{config.get('of')}{len(self.df)}"
-        )
+        self.record_label.config(text=self.record_text())
+
+        self.progress_label.config(text=self.progress_text())
+        self.rate_label.config(text=self.rate_text())
 
         # 更新按钮状态
-        self.prev_btn["state"] = "disabled" if self.current_record == 0 else "normal"
-        self.next_btn["state"] = "disabled" if self.current_record == len(self.df) - 1 else "normal"
+        self.prev_btn["state"] = "normal" if self.session.has_prev() else "disabled"
+        self.next_btn["state"] = "normal" if self.session.has_next() else "disabled"
 
-        # 直接重新创建整个数据区域
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ttk.Frame):  # 主框架
-                for child in widget.winfo_children():
-                    if isinstance(child, ttk.LabelFrame) and child["text"] == "Data":
-                        # 销毁原有数据区域
-                        child.destroy()
-                        # 创建新的数据区域
-                        new_data_frame = ttk.LabelFrame(widget, text="Data", padding=10)
-                        new_data_frame.pack(fill="both", expand=True, pady=10)
-
-                        # 重新创建Canvas和滚动条
-                        canvas = tk.Canvas(new_data_frame)
-                        scrollbar = ttk.Scrollbar(new_data_frame, orient="vertical", command=canvas.yview)
-                        scrollable_frame = ttk.Frame(canvas)
-
-                        scrollable_frame.bind(
-                            "<Configure>",
-                            lambda e: canvas.configure(
-                                scrollregion=canvas.bbox("all")
-                            )
-                        )
-
-                        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-                        canvas.configure(yscrollcommand=scrollbar.set)
-
-                        canvas.pack(side="left", fill="both", expand=True)
-                        scrollbar.pack(side="right", fill="y")
-
-                        # 显示当前记录
-                        self.display_record(scrollable_frame)
-                        break
-                break
+        # 复用已有的记录视图，只更新显示内容
+        self.display_record()
+        self.data_canvas.yview_moveto(0)
 
     def save_data(self):
         """保存数据"""
@@ -773,6 +1505,18 @@ class DataAnnotationApp:
         entry = ttk.Entry(frame, textvariable=self.filename_var)
         entry.pack(pady=10, fill="x")
 
+        # 导出格式，只列出当前环境可用的格式
+        format_frame = ttk.Frame(frame)
+        format_frame.pack(pady=5)
+
+        format_label = ttk.Label(format_frame, text=config.get("export_format"))
+        format_label.pack(side="left", padx=5)
+
+        formats = available_formats()
+        self.format_var = tk.StringVar(value=self.export_format if self.export_format in formats else "csv")
+        format_combo = ttk.Combobox(format_frame, textvariable=self.format_var, values=formats, state="readonly")
+        format_combo.pack(side="left", padx=5)
+
         # 按钮框架
         btn_frame = ttk.Frame(frame)
         btn_frame.pack(pady=20)
@@ -786,55 +1530,83 @@ class DataAnnotationApp:
 
         save_btn = ttk.Button(
             btn_frame,
-            text=config.get("save_now"),
+            text=config.get("export"),
             command=self.process_save
         )
         save_btn.pack(side="left", padx=10, ipadx=20, ipady=10)
 
     def process_save(self):
-        """处理保存操作"""
+        """处理保存操作：获取标注快照后在后台线程写入，期间可以继续标注"""
         filename = self.filename_var.get().strip()
         if not filename:
             show_message(config.get("error"), config.get("filename_required"), "error")
             return
 
-        # 显示保存中状态
-        saving_label = ttk.Label(self.root, text=config.get("saving"))
-        saving_label.pack(pady=10)
-        self.root.update()
+        if self.save_in_progress:
+            show_message(config.get("warning"), config.get("save_in_progress"), "warning")
+            return
+
+        # 记住选择的格式，下次导出时默认使用
+        fmt = self.export_format = self.format_var.get()
+
+        # 多人模式下先拉取其他标注者的标注，导出全部人的结果
+        self.sync_shared()
+
+        # 快照只复制标注数组，之后的修改不会影响正在写入的文件
+        labels, version = self.session.snapshot()
+        self.save_in_progress = True
+        self.save_progress = (0, len(labels))
+        self.save_result = None
 
-        # 在后台线程中保存
         def save_thread():
-            success, result = save_annotated_data(self.df, self.filepath, filename)
+            def progress(rows_written, total):
+                self.save_progress = (rows_written, total)
 
-            self.root.after(0, lambda: self.handle_save_result(success, result, saving_label))
+            self.save_result = self.session.export(filename, labels, progress, fmt)
 
         Thread(target=save_thread, daemon=True).start()
 
-    def handle_save_result(self, success, result, saving_label):
+        # 返回标注界面，在状态栏显示保存进度
+        self.create_annotation_interface()
+        self.root.after(100, lambda: self.poll_save(version))
+
+    def poll_save(self, version):
+        """轮询保存线程的进度和结果"""
+        if self.save_result is None:
+            rows_written, total = self.save_progress
+            percent = rows_written * 100 // total if total else 0
+            self.set_status(config.get("save_progress").format(percent))
+            self.root.after(100, lambda: self.poll_save(version))
+            return
+
+        success, result = self.save_result
+        self.save_result = None
+        self.save_in_progress = False
+        self.handle_save_result(success, result, version)
+
+    def handle_save_result(self, success, result, version):
         """处理保存结果"""
-        saving_label.destroy()
+        self.set_status(self.journal_status)
 
         if success:
-            save_path, file_size, save_time = result
+            save_path, file_size, save_time, throughput = result
             message = (
                 f"{config.get('save_complete')}\n\n"
                 f"{config.get('save_location')}{save_path}\n"
                 f"{config.get('file_size')}{file_size}\n"
+                f"{config.get('write_speed')}{throughput}\n"
                 f"{config.get('save_time')}{save_time}"
             )
 
             show_message(config.get("success"), message, "success")
-            self.unsaved_changes = False
-
-            # 返回标注界面
-            self.create_annotation_interface()
+            # 导出完成后压缩日志，每行只保留最终标注
+            self.session.mark_exported(version)
         else:
             show_message(config.get("error"), result, "error")
 
     def finish_annotation(self):
         """完成标注"""
-        if self.unsaved_changes:
+        if self.session.unsaved_changes:
             if not messagebox.askyesno(
                     config.get("warning"),
                     config.get("unsaved_changes"),
@@ -844,36 +1616,81 @@ class DataAnnotationApp:
 
         self.save_data()
 
-    def setup_save_reminder(self):
-        """设置保存提醒"""
-
-        def reminder():
-            if self.unsaved_changes and not self.save_reminder_active:
-                self.save_reminder_active = True
-                show_message(
-                    config.get("info"),
-                    config.get("save_reminder"),
-                    "info"
-                )
-                self.save_reminder_active = False
-
-            self.root.after(300000, reminder)  # 5分钟提醒一次
+    def save_journal(self):
+        """将标注日志落盘，耗时只与修改条数有关"""
+        self.save_current_label()
+        self.session.flush()
+        self.journal_status = config.get("journal_saved").format(self.session.journal.edit_count)
+        self.set_status(self.journal_status)
+
+    def set_status(self, text):
+        """更新标注界面的状态栏（当前不在标注界面时忽略）"""
+        if self.status_label.winfo_exists():
+            self.status_label.config(text=text)
+
+    def setup_autosave_status(self):
+        """定期在状态栏显示最近一次自动保存的时间（保存本身在后台线程中进行）"""
+        last_shown = [None]
+
+        def refresh():
+            self.sync_shared()
+            if self.session is not None and not self.save_in_progress:
+                last_saved = self.session.autosave.last_saved
+                if last_saved is not None and last_saved != last_shown[0]:
+                    last_shown[0] = last_saved
+                    self.journal_status = config.get("autosaved").format(
+                        datetime.fromtimestamp(last_saved).strftime("%H:%M:%S")
+                    )
+                    self.set_status(self.journal_status)
+
+            self.root.after(1000, refresh)
+
+        self.root.after(1000, refresh)
+
+    def sync_shared(self):
+        """多人模式：同步其他标注者的标注，提示被拒绝的修改"""
+        if self.session is None or self.session.shared is None:
+            return
+        try:
+            rejected, displayed_changed = self.session.sync_shared(self.displayed_record)
+        except Exception as e:
+            print(f"Error syncing shared store: {e}")
+            return
 
-        self.root.after(300000, reminder)
+        # 当前显示的记录被他人修改时同步输入控件，避免之后被旧值覆盖
+        if displayed_changed and self.displayed_record is not None:
+            self.label_var.set(self.session.get_label(self.displayed_record))
+        if rejected:
+            self.journal_status = config.get("shared_rejected").format(rejected)
+            self.set_status(self.journal_status)
+        if self.progress_label.winfo_exists():
+            self.progress_label.config(text=self.progress_text())
+        if self.view_mode == "grid" and self.grid_view.winfo_exists():
+            self.grid_view.schedule_render()
 
     def clear_window(self):
         """清除窗口内容"""
+        if self.update_pending is not None:
+            self.root.after_cancel(self.update_pending)
+            self.update_pending = None
+        self.displayed_record = None
+        self.root.unbind("<Key>")
         for widget in self.root.winfo_children():
             widget.destroy()
 
     def on_close(self):
         """窗口关闭事件处理"""
-        if self.unsaved_changes:
+        if self.save_in_progress:
             if not messagebox.askyesno(
                     config.get("warning"),
-                    config.get("exit_confirmation"),
+                    config.get("exit_while_saving"),
                     parent=self.root
             ):
                 return
 
+        if self.session is not None:
+            # 修改已记录在日志中，关闭前落盘即可
+            self.save_current_label()
+            self.session.close()
+
         self.root.destroy()
\ No newline at end of file
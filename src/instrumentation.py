@@ -0,0 +1,186 @@
+import atexit
+import bisect
+import cProfile
+import csv
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# 直方图桶上界（秒）：1 微秒到约 100 秒，按 1.25 倍递增
+BUCKET_BOUNDS = [1e-6 * 1.25 ** i for i in range(83)]
+
+
+class Histogram:
+    """对数分桶的耗时直方图"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, duration):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def percentile(self, q):
+        """估算分位数，返回所在桶的上界（不超过最大值）"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                bound = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class RateCounter:
+    """滑动窗口内的事件速率，用于统计每分钟标注的记录数"""
+
+    def __init__(self, window=60.0):
+        self.window = window
+        self.events = deque()
+        self.started = None
+
+    def record(self):
+        now = time.monotonic()
+        if self.started is None:
+            self.started = now
+        self.events.append(now)
+
+    def per_minute(self):
+        """最近 window 秒内的速率；开始不足 window 秒时按已用时间计算"""
+        if self.started is None:
+            return 0.0
+        now = time.monotonic()
+        while self.events and self.events[0] < now - self.window:
+            self.events.popleft()
+        elapsed = max(min(now - self.started, self.window), 1.0)
+        return len(self.events) * 60.0 / elapsed
+
+
+class Instrumentation:
+    """热点操作耗时统计，可选对某个操作进行 cProfile 采样"""
+
+    def __init__(self):
+        self.enabled = False
+        self.output_path = None
+        self.profile_op = None
+        self.histograms = {}
+        self.context = {}
+        self._profiler = None
+        self._lock = threading.Lock()
+
+    def enable(self, output_path, profile_op=None):
+        """开启统计，退出时写入 output_path（.json 或 .csv）"""
+        self.enabled = True
+        self.output_path = output_path
+        self.profile_op = profile_op
+        if profile_op:
+            self._profiler = cProfile.Profile()
+        atexit.register(self.dump)
+
+    def set_context(self, **context):
+        """记录数据集等上下文信息，随结果一起输出"""
+        self.context.update(context)
+
+    def record(self, name, duration):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(duration)
+
+    @contextmanager
+    def measure(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        profiling = self._profiler is not None and name == self.profile_op
+        if profiling:
+            self._profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+            if profiling:
+                self._profiler.disable()
+
+    def summary(self):
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def dump(self):
+        """写出统计结果；开启 cProfile 时另存为 .prof 文件"""
+        if not self.output_path:
+            return
+
+        summary = self.summary()
+        try:
+            if self.output_path.endswith(".csv"):
+                with open(self.output_path, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["operation", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+                    for name, stats in summary.items():
+                        writer.writerow([name] + [stats[key] for key in
+                                                  ("count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")])
+            else:
+                with open(self.output_path, "w", encoding="utf-8") as f:
+                    json.dump({
+                        "timestamp": datetime.now().isoformat(timespec="seconds"),
+                        "context": self.context,
+                        "operations": summary,
+                    }, f, indent=2, ensure_ascii=False, default=str)
+
+            if self._profiler is not None:
+                self._profiler.dump_stats(f"{os.path.splitext(self.output_path)[0]}.prof")
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
+
+instrumentation = Instrumentation()
+
+
+def timed(name):
+    """装饰器：统计函数每次调用的耗时"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+            with instrumentation.measure(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def enable_from_environment():
+    """通过环境变量 ANNOTATION_METRICS（输出文件）和 ANNOTATION_PROFILE_OP（cProfile 操作名）开启"""
+    output_path = os.environ.get("ANNOTATION_METRICS")
+    if output_path and not instrumentation.enabled:
+        instrumentation.enable(output_path, os.environ.get("ANNOTATION_PROFILE_OP"))
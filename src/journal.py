@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from .dataset_paths import sidecar_base, source_fingerprint
+
+# 累积多少条记录后执行一次 fsync
+FSYNC_BATCH_SIZE = 16
+
+
+def journal_path(source_path):
+    """标注日志文件路径"""
+    return f"{sidecar_base(source_path)}.annotations.jsonl"
+
+
+def entry_rows(entry, length):
+    """批量修改记录涉及的行（切片或行号数组），超出范围的行被忽略"""
+    if "range" in entry:
+        start, stop = entry["range"]
+        return slice(max(start, 0), min(stop, length))
+    rows = np.asarray(entry["rows"], dtype=np.int64)
+    return rows[(rows >= 0) & (rows < length)]
+
+
+class AnnotationJournal:
+    """只追加的标注日志：每次标注修改写入一行 (行号, 列名, 值, 时间戳)
+
+    传入 fingerprint（数据源指纹）时保存在 <日志>.meta.json 中。数据源在日志写入后被修改过
+    （例如插入了行）时，日志中的行号已不可信：旧日志移到 stale_path，不再重放，新日志从空开始。
+    """
+
+    def __init__(self, path, batch_size=FSYNC_BATCH_SIZE, fingerprint=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = 0
+        self.edit_count = 0
+        self.stale_path = None
+        if fingerprint is not None:
+            self._check_fingerprint(fingerprint)
+        # 自动保存线程和界面线程都会写日志
+        self._lock = threading.RLock()
+        self._file = open(path, "a", encoding="utf-8")
+
+        # 上次崩溃留下的半行需要先换行，避免与新记录粘连
+        if self._file.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+
+    @classmethod
+    def for_source(cls, source_path):
+        return cls(journal_path(source_path), fingerprint=source_fingerprint(source_path))
+
+    def _check_fingerprint(self, fingerprint):
+        """核对日志所属数据源的指纹，不一致时将旧日志移到一旁"""
+        meta_path = f"{self.path}.meta.json"
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                stored = json.load(f).get("fingerprint")
+        except (OSError, ValueError, AttributeError):
+            # 没有元数据的旧日志无法核对，按原样使用
+            stored = None
+
+        if stored == fingerprint:
+            return
+        if stored is not None and os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            self.stale_path = f"{self.path}.stale-{time.strftime('%Y%m%d-%H%M%S')}"
+            os.replace(self.path, self.stale_path)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint}, f)
+
+    def append(self, row, column, value, ts=None):
+        """追加一条修改，达到批量大小时落盘"""
+        entry = {"row": int(row), "column": column, "value": value, "ts": time.time() if ts is None else ts}
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.pending += 1
+            self.edit_count += 1
+
+            if self.pending >= self.batch_size:
+                self.flush()
+
+    def append_batch(self, entries):
+        """追加一批修改 [(行号, 列名, 值, 时间戳), ...] 并立即落盘"""
+        with self._lock:
+            for row, column, value, ts in entries:
+                entry = {"row": int(row), "column": column, "value": value, "ts": ts}
+                self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.pending += 1
+                self.edit_count += 1
+            self.flush()
+
+    def append_bulk(self, rows, column, value, ts=None):
+        """追加一条批量修改并立即落盘
+
+        rows 为连续区间时记为 {"range": [起, 止)}，否则记为行号列表 {"rows": [...]}。
+        """
+        entry = {"column": column, "value": value, "ts": time.time() if ts is None else ts}
+        if isinstance(rows, slice):
+            entry["range"] = [int(rows.start), int(rows.stop)]
+        else:
+            entry["rows"] = np.asarray(rows, dtype=np.int64).tolist()
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.pending += 1
+            self.edit_count += 1
+            self.flush()
+
+    def flush(self):
+        """将缓冲的修改写入磁盘并 fsync"""
+        with self._lock:
+            if self.pending == 0:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.pending = 0
+
+    def tell(self):
+        """已写入日志的字节数，作为之后追加的记录的起始偏移"""
+        with self._lock:
+            self._file.flush()
+            return os.fstat(self._file.fileno()).st_size
+
+    def replay(self, labels, column, offset=0):
+        """将日志中该列的修改按顺序应用到标注数组，返回应用的条数
+
+        offset 为开始重放的字节偏移（恢复会话时只重放快照之后的记录）。
+        """
+        applied = 0
+        for entry in self.read_entries(offset):
+            if entry["column"] != column:
+                continue
+            if "row" in entry:
+                if 0 <= entry["row"] < len(labels):
+                    labels[entry["row"]] = entry["value"]
+                    applied += 1
+            else:
+                rows = entry_rows(entry, len(labels))
+                labels[rows] = entry["value"]
+                applied += 1
+        return applied
+
+    def read_entries(self, offset=0):
+        """读取 offset 字节之后的日志记录，忽略崩溃时写了一半的最后一行"""
+        with self._lock:
+            self._file.flush()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                yield entry
+
+    def compact(self):
+        """压缩日志：每个 (行号, 列名) 只保留最后一次修改"""
+        with self._lock:
+            return self._compact()
+
+    def _compact(self):
+        self.flush()
+        # 从后往前扫描：单行修改被之后的单行或批量修改覆盖时丢弃，批量修改全部保留
+        kept = []
+        covered_rows = set()
+        covered_bulk = []
+        for entry in reversed(list(self.read_entries())):
+            column = entry["column"]
+            if "row" not in entry:
+                kept.append(entry)
+                rows = range(*entry["range"]) if "range" in entry else set(entry["rows"])
+                covered_bulk.append((column, rows))
+                continue
+            key = (entry["row"], column)
+            if key in covered_rows or any(
+                bulk_column == column and entry["row"] in rows for bulk_column, rows in covered_bulk
+            ):
+                continue
+            covered_rows.add(key)
+            kept.append(entry)
+        kept.reverse()
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in kept:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return len(kept)
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._file.close()
@@ -0,0 +1,186 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# 分类标注中表示"未标注"的编码
+UNLABELED = -1
+
+
+def _save_array(path, array):
+    """先写临时文件再替换，已映射旧文件的数组不受影响"""
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def _code_dtype(num_categories):
+    """选择能容纳全部类别编码的最小整数类型"""
+    if num_categories < np.iinfo(np.int8).max:
+        return np.int8
+    if num_categories < np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+
+class CategoricalLabels:
+    """分类标注存储：每行一个小整数编码，指向 categories 中的选项
+
+    categories 以 label_options 开头；已有标注列中不在选项里的值追加在后面，保证导出时不丢失。
+    """
+
+    def __init__(self, length, options, values=None):
+        # 重复的选项只保留第一次出现，类别必须唯一
+        self.categories = list(dict.fromkeys(options))
+        self._index = {value: i for i, value in enumerate(self.categories)}
+
+        if values is None:
+            self.codes = np.full(length, UNLABELED, dtype=_code_dtype(len(self.categories)))
+        else:
+            self.codes = self._encode_all(values)
+
+    def _encode_all(self, values):
+        """向量化编码已有的标注值"""
+        values = pd.Series(values, dtype=object).reset_index(drop=True)
+        extra = [value for value in pd.unique(values) if value != "" and value not in self._index]
+        for value in extra:
+            self._index[value] = len(self.categories)
+            self.categories.append(value)
+
+        codes = pd.Categorical(values, categories=self.categories).codes
+        return codes.astype(_code_dtype(len(self.categories)))
+
+    def _encode(self, value):
+        if value == "":
+            return UNLABELED
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.categories)
+            self._index[value] = code
+            self.categories.append(value)
+            # 类别超出当前整数类型范围时才扩展数组
+            dtype = _code_dtype(len(self.categories))
+            if dtype != self.codes.dtype:
+                self.codes = self.codes.astype(dtype)
+        return code
+
+    def _lookup(self):
+        # 末尾的空字符串对应编码 -1
+        return np.array(self.categories + [""], dtype=object)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._lookup()[self.codes[index]]
+        code = self.codes[index]
+        return self.categories[code] if code != UNLABELED else ""
+
+    def __setitem__(self, index, value):
+        self.codes[index] = self._encode(value)
+
+    def labeled_mask(self):
+        """每行是否已标注"""
+        return self.codes != UNLABELED
+
+    @classmethod
+    def from_codes(cls, codes, categories):
+        """由已保存的编码数组和类别列表创建（编码数组可以是内存映射）"""
+        labels = cls.__new__(cls)
+        labels.categories = list(categories)
+        labels._index = {value: i for i, value in enumerate(labels.categories)}
+        labels.codes = codes
+        return labels
+
+    def is_mapped(self, path):
+        """编码数组是否直接映射在 path 文件上"""
+        return isinstance(self.codes, np.memmap) and self.codes.filename == os.path.abspath(path)
+
+    def flush(self):
+        """将映射数组中的修改写回文件"""
+        if isinstance(self.codes, np.memmap):
+            self.codes.flush()
+
+    def save(self, path):
+        """将编码保存到 .npy 文件并改为映射该文件，之后的修改直接写入文件，返回类别列表
+
+        编码数组会被替换，只能在修改标注的线程中调用。
+        """
+        if self.is_mapped(path):
+            self.codes.flush()
+        else:
+            _save_array(path, self.codes)
+            self.codes = np.load(path, mmap_mode="r+")
+        return list(self.categories)
+
+    def copy(self):
+        """复制标注快照，只复制编码数组"""
+        snapshot = CategoricalLabels.__new__(CategoricalLabels)
+        snapshot.categories = list(self.categories)
+        snapshot._index = dict(self._index)
+        snapshot.codes = np.array(self.codes)
+        return snapshot
+
+
+class TextLabels:
+    """文本标注存储：每行一个字符串"""
+
+    def __init__(self, length, values=None):
+        if values is None:
+            self.values = np.full(length, "", dtype=object)
+        else:
+            self.values = np.array(pd.Series(values, dtype=object), dtype=object)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __setitem__(self, index, value):
+        self.values[index] = value
+
+    def labeled_mask(self):
+        """每行是否已标注"""
+        return self.values != ""
+
+    @classmethod
+    def from_codes(cls, codes, categories):
+        """由已保存的 (编码, 取值列表) 还原文本标注"""
+        labels = cls.__new__(cls)
+        labels.values = np.array(list(categories) + [""], dtype=object)[codes]
+        return labels
+
+    def is_mapped(self, path):
+        # 字符串无法内存映射，每次保存都写入完整快照
+        return False
+
+    def flush(self):
+        pass
+
+    def save(self, path):
+        """将文本标注编码为整数编码写入 .npy 文件，返回取值列表"""
+        codes, uniques = pd.factorize(self.values)
+        _save_array(path, codes.astype(np.int32))
+        return list(uniques)
+
+    def copy(self):
+        """复制标注快照（字符串对象不可变，只复制引用数组）"""
+        snapshot = TextLabels.__new__(TextLabels)
+        snapshot.values = self.values.copy()
+        return snapshot
+
+
+def create_label_store(label_type, length, options=None, values=None):
+    """根据标注类型创建标注存储；values 为已有标注列的值（缺失值为空字符串）"""
+    if label_type == "categorical":
+        return CategoricalLabels(length, options or [], values)
+    return TextLabels(length, values)
+
+
+def load_label_store(label_type, path, categories):
+    """读取 save() 保存的标注；分类标注以读写方式映射文件，修改直接写回"""
+    if label_type == "categorical":
+        return CategoricalLabels.from_codes(np.load(path, mmap_mode="r+"), categories)
+    return TextLabels.from_codes(np.load(path), categories)
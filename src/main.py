@@ -1,11 +1,38 @@
+import argparse
+import sys
 import tkinter as tk
 from .gui import DataAnnotationApp
 from .config import config
+from .instrumentation import instrumentation, enable_from_environment
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    # 耗时统计选项对界面和批处理命令都有效
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--metrics", default=None)
+    parser.add_argument("--profile-op", default=None)
+    # 多人标注：共享标注库路径和标注者名称
+    parser.add_argument("--shared-store", default=None)
+    parser.add_argument("--annotator", default=None)
+    options, argv = parser.parse_known_args(argv)
+    if options.metrics:
+        instrumentation.enable(options.metrics, options.profile_op)
+    else:
+        enable_from_environment()
+    if options.shared_store:
+        config.shared_store = options.shared_store
+    if options.annotator:
+        config.annotator = options.annotator
+
+    if argv:
+        # 带参数时运行无界面的批处理命令
+        from .cli import main as cli_main
+        return cli_main(argv)
 
-def main():
     root = tk.Tk()
     app = DataAnnotationApp(root)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,113 @@
+import numpy as np
+
+# 批量更新时超过该行数则向量化更新，而不是逐行更新
+BULK_UPDATE_THRESHOLD = 1024
+
+
+class UnlabeledIndex:
+    """未标注行索引：基于树状数组（Fenwick 树）统计未标注行
+
+    初始化时向量化构建，单行状态变化、查找下一个/上一个未标注行均为 O(log n)。
+    """
+
+    def __init__(self, labeled_mask):
+        self.size = len(labeled_mask)
+        self.unlabeled = ~np.asarray(labeled_mask, dtype=bool)
+        self._top_bit = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+        # tree[i] = unlabeled[i - lowbit(i) + 1 .. i] 之和（下标从1开始）
+        prefix = np.concatenate(([0], np.cumsum(self.unlabeled, dtype=np.int64)))
+        positions = np.arange(1, self.size + 1)
+        lowbit = positions & -positions
+        self.tree = np.zeros(self.size + 1, dtype=np.int64)
+        self.tree[1:] = prefix[positions] - prefix[positions - lowbit]
+        self.unlabeled_count = int(prefix[-1])
+
+    @property
+    def labeled_count(self):
+        return self.size - self.unlabeled_count
+
+    def set_labeled(self, index, labeled):
+        """更新一行的标注状态"""
+        if self.unlabeled[index] != labeled:
+            return
+        self.unlabeled[index] = not labeled
+        delta = -1 if labeled else 1
+        self.unlabeled_count += delta
+
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def set_labeled_many(self, indices, labeled):
+        """批量更新多行的标注状态，indices 为切片或行号数组
+
+        变化的行较少时逐行更新；否则只向量化更新覆盖这些行的树节点，
+        耗时与变化行的跨度成正比，而不是与总行数成正比。
+        """
+        if isinstance(indices, slice):
+            indices = np.arange(*indices.indices(self.size))
+        indices = np.asarray(indices, dtype=np.int64)
+        changed = indices[self.unlabeled[indices] == labeled]
+        if len(changed) <= BULK_UPDATE_THRESHOLD:
+            for index in changed:
+                self.set_labeled(int(index), labeled)
+            return
+
+        self.unlabeled[changed] = not labeled
+        delta = -1 if labeled else 1
+        self.unlabeled_count += delta * len(changed)
+
+        # 下标从1开始的窗口 [lo, hi]；local[k] 为位置 lo..lo+k-1 的变化量之和
+        lo, hi = int(changed.min()) + 1, int(changed.max()) + 1
+        width = hi - lo + 1
+        marks = np.zeros(width, dtype=np.int64)
+        marks[changed - (lo - 1)] = delta
+        local = np.concatenate(([0], np.cumsum(marks)))
+
+        # 窗口内的节点：tree[j] 的变化量 = 前缀变化量(j) - 前缀变化量(j - lowbit(j))
+        positions = np.arange(lo, hi + 1)
+        lowbit = positions & -positions
+        self.tree[lo:hi + 1] += local[positions - lo + 1] - local[np.clip(positions - lowbit - lo + 1, 0, width)]
+
+        # 窗口之后只有覆盖位置 hi 的 O(log n) 个节点受影响
+        j = hi + (hi & -hi)
+        while j <= self.size:
+            self.tree[j] += local[width] - local[min(max(j - (j & -j) - lo + 1, 0), width)]
+            j += j & -j
+
+    def _prefix(self, index):
+        """前 index 行（不含 index）中的未标注行数"""
+        total = 0
+        i = index
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return int(total)
+
+    def _find_kth(self, k):
+        """第 k 个（从1开始）未标注行的下标"""
+        position = 0
+        step = self._top_bit
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self.tree[nxt] < k:
+                position = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return position
+
+    def next_unlabeled(self, index):
+        """index 之后第一个未标注行，没有时返回 None"""
+        k = self._prefix(index + 1) + 1
+        if k > self.unlabeled_count:
+            return None
+        return self._find_kth(k)
+
+    def prev_unlabeled(self, index):
+        """index 之前最后一个未标注行，没有时返回 None"""
+        k = self._prefix(index)
+        if k == 0:
+            return None
+        return self._find_kth(k)
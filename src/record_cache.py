@@ -0,0 +1,175 @@
+import sys
+import threading
+from collections import OrderedDict
+
+# 预览中表示被截断的后缀
+ELLIPSIS = "…"
+
+
+def make_preview(text, max_chars, max_lines):
+    """截断过长的单元格文本，最多保留 max_chars 个字符和 max_lines 行"""
+    preview = text[:max_chars]
+    cut = -1
+    for _ in range(max_lines):
+        cut = preview.find("\n", cut + 1)
+        if cut < 0:
+            break
+    if cut >= 0:
+        preview = preview[:cut]
+    if len(preview) < len(text):
+        return preview + ELLIPSIS
+    return text
+
+
+class RecordCache:
+    """已渲染记录的LRU缓存，后台线程预取当前记录前后的行
+
+    缓存内容是 {列名: 显示字符串} 以及截断后的预览 {列名: 预览字符串}，
+    命中时无需再读取、转换和截断数据。未截断的预览与完整字符串是同一个对象。
+    """
+
+    def __init__(self, source, ahead=32, behind=8, max_bytes=64 * 1024 * 1024,
+                 preview_chars=2000, preview_lines=20):
+        self.source = source
+        self.ahead = ahead
+        self.behind = behind
+        self.max_bytes = max_bytes
+        self.preview_chars = preview_chars
+        self.preview_lines = preview_lines
+
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        # 记录源的文件句柄不是线程安全的，读取时需要加锁
+        self._source_lock = threading.Lock()
+
+        self._position = 0
+        self._generation = 0
+        self._closed = False
+        self._wakeup = threading.Condition()
+        self._thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+        self._thread.start()
+
+    def get(self, index):
+        """获取一条记录的显示数据，并通知后台线程围绕该位置预取"""
+        return self._get_entry(index)[0]
+
+    def get_preview(self, index):
+        """获取一条记录截断后的预览 {列名: 预览字符串}"""
+        return self._get_entry(index)[1]
+
+    def _get_entry(self, index):
+        with self._lock:
+            entry = self._entries.get(index)
+            if entry is not None:
+                self._entries.move_to_end(index)
+                self.hits += 1
+        if entry is None:
+            entry = self._render(index)
+            with self._lock:
+                self.misses += 1
+                self._store(index, entry)
+
+        self.set_position(index)
+        return entry
+
+    def set_position(self, index):
+        """更新当前位置，中断正在进行的旧位置预取"""
+        with self._wakeup:
+            self._position = index
+            self._generation += 1
+            self._wakeup.notify()
+
+    def invalidate(self, index=None):
+        """清除一条或全部缓存记录"""
+        with self._lock:
+            if index is None:
+                self._entries.clear()
+                self._sizes.clear()
+                self._total_bytes = 0
+            elif index in self._entries:
+                del self._entries[index]
+                self._total_bytes -= self._sizes.pop(index)
+
+    def stats(self):
+        """缓存统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "prefetched": self.prefetched,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
+
+    def close(self):
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+
+    def _render(self, index):
+        """读取一条记录，返回 (显示字符串, 预览字符串)"""
+        with self._source_lock:
+            record = self.source.get_record(index)
+        payload = {col: str(value) for col, value in record.items()}
+        previews = {col: make_preview(text, self.preview_chars, self.preview_lines)
+                    for col, text in payload.items()}
+        return payload, previews
+
+    def _store(self, index, entry):
+        """写入缓存并按内存上限淘汰最久未使用的记录（调用方持有 _lock）"""
+        if index in self._entries:
+            return
+        payload, previews = entry
+        size = sum(sys.getsizeof(value) for value in payload.values())
+        size += sum(sys.getsizeof(previews[col]) for col, value in payload.items() if previews[col] is not value)
+        self._entries[index] = entry
+        self._sizes[index] = size
+        self._total_bytes += size
+
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            old_index, _ = self._entries.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(old_index)
+
+    def _prefetch_order(self, position):
+        """先预取后面的记录，再预取前面的记录"""
+        total = len(self.source)
+        for offset in range(1, self.ahead + 1):
+            if position + offset < total:
+                yield position + offset
+        for offset in range(1, self.behind + 1):
+            if position - offset >= 0:
+                yield position - offset
+
+    def _prefetch_loop(self):
+        seen_generation = 0
+        while True:
+            with self._wakeup:
+                while self._generation == seen_generation and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+                seen_generation = self._generation
+                position = self._position
+
+            for index in self._prefetch_order(position):
+                if self._generation != seen_generation or self._closed:
+                    break
+                with self._lock:
+                    if index in self._entries:
+                        continue
+                try:
+                    entry = self._render(index)
+                except Exception as e:
+                    print(f"Error prefetching record {index}: {e}")
+                    break
+                with self._lock:
+                    self._store(index, entry)
+                    self.prefetched += 1
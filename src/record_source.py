@@ -0,0 +1,312 @@
+import csv
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .dataset_paths import is_sharded_path
+
+# 行索引侧车文件的格式版本，格式变化时递增以使旧索引失效
+INDEX_VERSION = 2
+# 扫描行起始位置时每次读取的块大小
+SCAN_BLOCK_SIZE = 8 * 1024 * 1024
+# 按块读取CSV的选项：值按原样作为字符串读取（各块格式一致，"007" 不会变成 7），
+# 空行也算一条记录，与行索引的行划分一致
+CSV_READ_OPTIONS = {"dtype": str, "keep_default_na": False, "skip_blank_lines": False}
+
+
+class LoadCancelled(Exception):
+    """加载被用户取消"""
+
+
+class RecordSource:
+    """记录源基类：按行号随机读取记录"""
+
+    columns = []
+    # 紧凑加载时的每列内存报告，见 compact.compact_dataframe
+    memory_report = None
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def get_record(self, index):
+        """读取一条记录，返回 {列名: 值} 字典"""
+        raise NotImplementedError
+
+    def get_column(self, name):
+        """读取整列数据"""
+        raise NotImplementedError
+
+    def iter_chunks(self, chunksize=100000):
+        """按块顺序读取全部数据，用于导出"""
+        raise NotImplementedError
+
+    def close(self):
+        """释放资源"""
+
+
+class DataFrameRecordSource(RecordSource):
+    """基于内存 DataFrame 的记录源（用于Excel等格式）"""
+
+    def __init__(self, df, memory_report=None):
+        self.df = df
+        self.columns = list(df.columns)
+        self.memory_report = memory_report
+
+    def __len__(self):
+        return len(self.df)
+
+    def get_record(self, index):
+        return self.df.iloc[index].to_dict()
+
+    def get_column(self, name):
+        return self.df[name]
+
+    def iter_chunks(self, chunksize=100000):
+        for start in range(0, len(self.df), chunksize):
+            yield self.df.iloc[start:start + chunksize]
+
+
+class CsvRecordSource(RecordSource):
+    """基于行偏移索引的CSV记录源，只解析需要显示的行"""
+
+    def __init__(self, filepath, offsets=None, progress=None, cancel_event=None):
+        self.filepath = filepath
+        if offsets is None:
+            offsets = load_or_build_row_index(filepath, progress, cancel_event)
+        self.offsets = offsets
+        self.file_size = os.path.getsize(filepath)
+        self.encoding = detect_encoding(filepath)
+        self._file = open(filepath, "rb")
+
+        # 表头位于第一条数据行之前
+        self._file.seek(0)
+        header_bytes = self._file.read(int(self.offsets[0]) if len(self.offsets) else self.file_size)
+        self.columns = _parse_row(header_bytes, self.encoding)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get_record(self, index):
+        start = int(self.offsets[index])
+        end = int(self.offsets[index + 1]) if index + 1 < len(self.offsets) else self.file_size
+
+        self._file.seek(start)
+        values = _parse_row(self._file.read(end - start), self.encoding)
+
+        # 列数不足时补空值，多余的值丢弃
+        values += [""] * (len(self.columns) - len(values))
+        return dict(zip(self.columns, values))
+
+    def get_column(self, name):
+        return pd.read_csv(self.filepath, usecols=[name], encoding=self.encoding, **CSV_READ_OPTIONS)[name]
+
+    def iter_chunks(self, chunksize=100000):
+        return read_csv_chunks(self.filepath, chunksize, self.encoding)
+
+    def close(self):
+        self._file.close()
+
+
+def read_csv_chunks(filepath, chunksize=100000, encoding=None):
+    """按块读取CSV，行划分与行索引一致，值为原始字符串"""
+    encoding = encoding or detect_encoding(filepath)
+    for chunk in pd.read_csv(filepath, chunksize=chunksize, encoding=encoding, **CSV_READ_OPTIONS):
+        yield chunk
+
+
+def _parse_row(raw, encoding):
+    """解析单行CSV字节"""
+    text = raw.decode(encoding, errors="replace")
+    for row in csv.reader(io.StringIO(text)):
+        return row
+    return []
+
+
+def detect_encoding(filepath):
+    """检测文件是否带有UTF-8 BOM"""
+    with open(filepath, "rb") as f:
+        return "utf-8-sig" if f.read(3) == b"\xef\xbb\xbf" else "utf-8"
+
+
+def index_path(filepath):
+    """行索引侧车文件路径"""
+    return f"{filepath}.rowidx.npy", f"{filepath}.rowidx.json"
+
+
+def _file_key(filepath):
+    stat = os.stat(filepath)
+    return {"version": INDEX_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_or_build_row_index(filepath, progress=None, cancel_event=None):
+    """读取行索引侧车文件，失效或不存在时重新扫描"""
+    offsets = load_row_index(filepath)
+    if offsets is None:
+        offsets = build_row_index(filepath, progress, cancel_event)
+        save_row_index(filepath, offsets)
+    elif progress:
+        progress(os.path.getsize(filepath), len(offsets))
+    return offsets
+
+
+def load_row_index(filepath):
+    """读取与文件大小和修改时间匹配的行索引"""
+    npy_path, meta_path = index_path(filepath)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta != _file_key(filepath):
+            return None
+        return np.load(npy_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+
+def save_row_index(filepath, offsets):
+    """保存行索引侧车文件，目录不可写时仅保留在内存中"""
+    npy_path, meta_path = index_path(filepath)
+    try:
+        np.save(npy_path, offsets)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(_file_key(filepath), f)
+    except OSError as e:
+        print(f"Error saving row index: {e}")
+
+
+def _quote_toggles(buf, quotes, prev_byte, in_quotes):
+    """块中改变引号状态的引号位置
+
+    连续的引号作为一组：偶数个是转义的引号或空字段，不改变状态；奇数个的组在字段开头
+    （分隔符或行首之后）时可以开始引号字段，后面紧跟分隔符、换行或文件末尾时可以结束引号字段。
+    不在字段开头的引号（例如 5" screen）按普通字符处理。
+    """
+    gaps = np.diff(quotes) != 1
+    run_start = quotes[np.concatenate(([True], gaps))]
+    run_end = quotes[np.concatenate((gaps, [True]))] + 1
+    odd = (run_end - run_start) % 2 == 1
+
+    before = np.where(run_start > 0, buf[np.maximum(run_start - 1, 0)], prev_byte)
+    after = buf[np.minimum(run_end, len(buf) - 1)]
+    can_open = odd & np.isin(before, (0x2C, 0x0A))
+    can_close = odd & (np.isin(after, (0x2C, 0x0A, 0x0D)) | (run_end == len(buf)))
+
+    candidates = np.flatnonzero(can_open | can_close)
+    # 通常开始和结束交替出现，可以直接按顺序配对；遇到不合规范的引号时逐个判断
+    inside = (np.arange(len(candidates)) + in_quotes) % 2 == 1
+    if np.all(np.where(inside, can_close[candidates], can_open[candidates])):
+        return run_start[candidates]
+
+    toggles = []
+    for i in candidates.tolist():
+        if can_close[i] if in_quotes else can_open[i]:
+            toggles.append(run_start[i])
+            in_quotes = not in_quotes
+    return np.array(toggles, dtype=np.int64)
+
+
+def build_row_index(filepath, progress=None, cancel_event=None):
+    """扫描一次文件，返回每条数据行起始字节偏移的数组
+
+    引号内的换行不作为行边界，引号字段的判断见 _quote_toggles。
+    每读完一块调用 progress(已读字节数, 已发现行数)，cancel_event 被设置时抛出 LoadCancelled。
+    """
+    file_size = os.path.getsize(filepath)
+    boundaries = []
+    in_quotes = False
+    position = 0
+    row_count = 0
+    # 上一块的最后一个字节（文件开头视为行首），以及留到下一块处理的块末尾的引号
+    prev_byte = 0x0A
+    carry = b""
+
+    with open(filepath, "rb") as f:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise LoadCancelled()
+
+            block = f.read(SCAN_BLOCK_SIZE)
+            data = carry + block
+            if block:
+                # 引号之后的字节在下一块中，块末尾的引号留到下一块再判断
+                kept = data.rstrip(b'"')
+                carry = data[len(kept):]
+                data = kept
+            else:
+                carry = b""
+            if not data:
+                if not block:
+                    break
+                continue
+
+            buf = np.frombuffer(data, dtype=np.uint8)
+            newlines = np.flatnonzero(buf == 0x0A)
+            quotes = np.flatnonzero(buf == 0x22)
+
+            if len(quotes) == 0:
+                found = newlines if not in_quotes else newlines[:0]
+            else:
+                toggles = _quote_toggles(buf, quotes, prev_byte, in_quotes)
+                # 每个换行符之前改变引号状态的次数（含块开始时的引号状态）
+                parity = (np.searchsorted(toggles, newlines) + in_quotes) % 2
+                found = newlines[parity == 0]
+                in_quotes = bool((len(toggles) + in_quotes) % 2)
+
+            boundaries.append(found + position + 1)
+            position += len(data)
+            prev_byte = data[-1]
+            row_count += len(found)
+            if progress:
+                # 第一个边界是表头结束，不计入数据行
+                progress(position, max(row_count - 1, 0))
+            if not block:
+                break
+
+    starts = np.concatenate(boundaries) if boundaries else np.empty(0, dtype=np.int64)
+    # 第一个边界是表头结束，文件末尾的换行不产生新行
+    starts = starts[starts < file_size]
+    return starts.astype(np.int64)
+
+
+def read_csv_in_memory(filepath, progress=None, cancel_event=None, chunksize=100000):
+    """分块读取整个CSV到内存，支持进度报告和取消"""
+    chunks = []
+    row_count = 0
+    with open(filepath, "rb") as f:
+        for chunk in pd.read_csv(f, chunksize=chunksize, encoding=detect_encoding(filepath)):
+            if cancel_event is not None and cancel_event.is_set():
+                raise LoadCancelled()
+            chunks.append(chunk)
+            row_count += len(chunk)
+            if progress:
+                progress(f.tell(), row_count)
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+def open_record_source(filepath, progress=None, cancel_event=None, sheet_name=None, compact=False):
+    """根据文件类型打开记录源
+
+    compact 为 True 时将数据读入内存并压缩列类型（CSV 不再使用行偏移索引）。
+    目录或通配符模式作为分片数据集打开（不支持紧凑加载）。
+    """
+    if is_sharded_path(filepath):
+        from .sharded_source import ShardedRecordSource
+        return ShardedRecordSource(filepath, progress, cancel_event)
+
+    if filepath.endswith('.csv'):
+        if not compact:
+            return CsvRecordSource(filepath, progress=progress, cancel_event=cancel_event)
+        df = read_csv_in_memory(filepath, progress, cancel_event)
+    elif filepath.endswith(('.xlsx', '.xls')):
+        from .excel_reader import load_excel_cached
+        df = load_excel_cached(filepath, sheet_name, progress, cancel_event)
+        if not compact:
+            return DataFrameRecordSource(df)
+    else:
+        return None
+
+    from .compact import compact_dataframe
+    df, report = compact_dataframe(df)
+    return DataFrameRecordSource(df, report)
@@ -0,0 +1,104 @@
+import re
+import threading
+from array import array
+from collections import defaultdict
+
+import numpy as np
+
+# 中日韩字符范围：假名、汉字（含扩展 A）、韩文音节
+CJK_RANGES = "぀-ヿ㐀-䶿一-鿿가-힯"
+# 连续的中日韩字符，或连续的其他字母数字（不含中日韩字符，"APP偶尔" 切分为 "APP" 和 "偶尔"）
+TOKEN_PATTERN = re.compile(rf"[{CJK_RANGES}]+|[^\W_{CJK_RANGES}]+")
+CJK_PATTERN = re.compile(rf"[{CJK_RANGES}]")
+
+
+def tokenize(text):
+    """分词：中日韩文本切分为单字和双字 n-gram，其他文本按单词切分并转为小写"""
+    tokens = set()
+    for run in TOKEN_PATTERN.findall(text):
+        if CJK_PATTERN.match(run):
+            tokens.update(run)
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.add(run.lower())
+    return tokens
+
+
+def query_tokens(term):
+    """查询词对应的索引词：多字中文词使用双字 n-gram，单字使用单字"""
+    tokens = []
+    for run in TOKEN_PATTERN.findall(term):
+        if CJK_PATTERN.match(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+
+class SearchIndex:
+    """文本列的倒排索引，在后台线程中构建
+
+    查询为空格分隔的多个关键词，返回同时包含全部关键词的行号（升序）。
+    中文关键词通过双字 n-gram 的交集匹配。
+    """
+
+    def __init__(self, source, columns):
+        self.source = source
+        self.columns = list(columns)
+        # 按位置选取列：pandas 读取的块会改写列名（空列名变为 "Unnamed: 0"，重复列名加 ".1"）
+        wanted = set(self.columns)
+        self.positions = [i for i, col in enumerate(source.columns) if col in wanted]
+        self.postings = {}
+        self.indexed_rows = 0
+        self.ready = False
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """在后台线程中构建索引"""
+        self._thread = threading.Thread(target=self._build, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _build(self):
+        postings = defaultdict(lambda: array("I"))
+        row = 0
+        try:
+            for chunk in self.source.iter_chunks():
+                if self._cancel.is_set():
+                    return
+                texts = chunk.iloc[:, self.positions].astype(str).agg(" ".join, axis=1)
+                for text in texts:
+                    for token in tokenize(text):
+                        postings[token].append(row)
+                    row += 1
+                self.indexed_rows = row
+        except Exception as e:
+            print(f"Error building search index: {e}")
+            self.error = str(e)
+            return
+
+        self.postings = {token: np.frombuffer(rows, dtype=np.uint32) for token, rows in postings.items()}
+        self.ready = True
+
+    def search(self, query):
+        """查询包含全部关键词的行，索引未就绪时返回 None"""
+        if not self.ready:
+            return None
+
+        result = None
+        for term in query.split():
+            for token in query_tokens(term):
+                rows = self.postings.get(token)
+                if rows is None:
+                    return np.empty(0, dtype=np.int64)
+                result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+                if len(result) == 0:
+                    return np.empty(0, dtype=np.int64)
+
+        if result is None:
+            return np.empty(0, dtype=np.int64)
+        return result.astype(np.int64)
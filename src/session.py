@@ -0,0 +1,444 @@
+import threading
+import time
+
+import numpy as np
+
+from .autosave import AutosaveScheduler
+from .config import config
+from .instrumentation import RateCounter
+from .journal import AnnotationJournal
+from .label_store import create_label_store, load_label_store
+from .progress_index import UnlabeledIndex
+from .record_cache import RecordCache
+from .search_index import SearchIndex
+from .session_state import labels_path, save_state, source_fingerprint
+from .utils import save_annotated_data
+
+
+class AnnotationSession:
+    """标注会话：数据源、标注、导航和保存状态，不依赖任何界面组件
+
+    GUI 通过它完成加载后的全部数据操作，基准测试也直接驱动它。
+    传入 shared_store（SharedAnnotationStore）时为多人模式：标注以共享库为准，
+    导航到未标注记录时只在自己租用的行中移动，自动保存时在事务中提交修改。
+    传入 state（session_state.load_state 的结果）时恢复上次的会话：标注直接映射保存的数组，
+    只重放之后追加的日志，并回到上次的位置。load_options 为重新打开数据源所需的参数，写入会话文件。
+    """
+
+    def __init__(self, source, filepath, label_column, label_type, label_options=None, new_column=True,
+                 shared_store=None, state=None, load_options=None):
+        self.source = source
+        self.filepath = filepath
+        self.label_column = label_column
+        self.label_type = label_type
+        self.label_options = list(label_options or [])
+        self.current_record = 0
+        self.unsaved_changes = False
+        # 每次标注修改递增，用于判断导出后是否又有新的修改
+        self.edit_version = 0
+        # 最近一分钟的标注速度（条/分钟）
+        self.throughput = RateCounter()
+
+        self.new_column = new_column
+        self.load_options = dict(load_options or {})
+        self.labels_path = labels_path(filepath)
+        if state is not None and state.get("rows") != len(source):
+            state = None
+        self.resumed = state is not None
+
+        # 恢复会话时直接读取标注数组；否则新列初始化空值，已有列读取该列作为初始标注
+        journal_offset = 0
+        if state is not None:
+            self.labels = load_label_store(label_type, self.labels_path, state["categories"])
+            self.current_record = min(max(int(state["current_record"]), 0), len(source) - 1)
+            journal_offset = state["journal_offset"]
+        elif new_column:
+            self.labels = create_label_store(label_type, len(source), self.label_options)
+        else:
+            existing = source.get_column(label_column)
+            existing = existing.astype(object).where(existing.notna(), "").astype(str)
+            self.labels = create_label_store(label_type, len(source), self.label_options, existing)
+
+        # 重放标注日志，恢复上次的修改；多人模式下以共享库中的标注为准
+        self.journal = AnnotationJournal.for_source(filepath)
+        # 日志在快照之后被替换过（例如外部删除）时从头重放，按顺序重放全部记录结果不变
+        if journal_offset > self.journal.tell():
+            journal_offset = 0
+        self.shared = shared_store
+        self.shared_version = 0
+        self.leased_rows = []
+        self.rejected_rows = []
+        if shared_store is None:
+            self.restored_edits = self.journal.replay(self.labels, label_column, journal_offset)
+        else:
+            if shared_store.created and not new_column:
+                labeled = np.flatnonzero(self.labels.labeled_mask())
+                shared_store.import_labels((row, self.labels[int(row)]) for row in labeled)
+            items, self.shared_version = shared_store.labels_since(0)
+            self._apply_shared(items, update_progress=False)
+            self.restored_edits = 0
+            # 从自己租用的第一行开始标注
+            self.leased_rows = shared_store.my_leases() or shared_store.lease()
+            if self.leased_rows:
+                self.current_record = self.leased_rows[0]
+
+        # 未标注行索引，支持快速跳转到未标注记录和统计进度
+        self.progress = UnlabeledIndex(self.labels.labeled_mask())
+
+        # 会话文件：标注数组快照对应的日志偏移，之后的修改都在日志中
+        self.journal_offset = journal_offset
+        # 标注数组快照对应的修改版本号，None 表示尚未保存；恢复时重放了日志则在关闭时重写快照
+        if state is None:
+            self.snapshot_version = None
+        else:
+            self.snapshot_version = -1 if self.restored_edits else 0
+        self.categories = state["categories"] if state is not None else []
+        self._state_lock = threading.RLock()
+
+        # 自上次自动保存以来修改过的行 {行号: (值, 时间戳)}，同一行多次修改只保存最后一次
+        self.dirty_rows = {}
+        # 待写入日志的批量修改 [(此前的单行修改, 行, 值, 时间戳), ...]，按修改顺序写入
+        self.pending_bulk = []
+        self._dirty_lock = threading.Lock()
+        self.save_state(labels=state is None)
+        self.autosave = AutosaveScheduler(
+            self._flush_dirty,
+            delay=config.autosave_delay,
+            max_delay=config.autosave_max_delay,
+            max_edits=config.autosave_max_edits
+        )
+
+        # 关键词搜索：后台构建倒排索引；filter_rows 为当前搜索结果（升序行号），None 表示不过滤
+        self.filter_rows = None
+        search_columns = [col for col in self.display_columns
+                          if config.search_columns is None or col in config.search_columns]
+        self.search_index = SearchIndex(source, search_columns)
+        self.search_index.start()
+
+        self.record_cache = RecordCache(
+            source,
+            ahead=config.prefetch_ahead,
+            behind=config.prefetch_behind,
+            max_bytes=config.cache_memory_mb * 1024 * 1024,
+            preview_chars=config.cell_preview_chars,
+            preview_lines=config.cell_preview_lines
+        )
+
+    def __len__(self):
+        return len(self.source)
+
+    @property
+    def display_columns(self):
+        """记录视图中显示的列（不含标注列）"""
+        return [col for col in self.source.columns if col != self.label_column]
+
+    def get_record(self, index=None):
+        """获取记录的显示数据 {列名: 字符串}，默认为当前记录"""
+        return self.record_cache.get(self.current_record if index is None else index)
+
+    def get_preview(self, index=None):
+        """获取记录截断后的预览 {列名: 字符串}，默认为当前记录"""
+        return self.record_cache.get_preview(self.current_record if index is None else index)
+
+    def get_label(self, index=None):
+        return self.labels[self.current_record if index is None else index]
+
+    def set_label(self, value, index=None):
+        """设置标注并标记该行待自动保存，返回是否有修改"""
+        index = self.current_record if index is None else index
+        if value == self.labels[index]:
+            return False
+
+        self.labels[index] = value
+        self.progress.set_labeled(index, value != "")
+        with self._dirty_lock:
+            self.dirty_rows[index] = (value, time.time())
+        self.autosave.notify_edit()
+        self.throughput.record()
+        self.unsaved_changes = True
+        self.edit_version += 1
+        return True
+
+    def set_label_bulk(self, rows, value):
+        """批量设置标注：rows 为连续区间（切片）或行号数组，一次向量化赋值
+
+        返回涉及的行数。整批修改在日志中只占一条记录。
+        """
+        if isinstance(rows, slice):
+            start, stop, _ = rows.indices(len(self.source))
+            rows = slice(start, max(stop, start))
+            count = rows.stop - rows.start
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            # 搜索结果已是升序且不重复，无需再排序
+            if len(rows) > 1 and not (rows[1:] > rows[:-1]).all():
+                rows = np.unique(rows)
+            rows = rows[(rows >= 0) & (rows < len(self.source))]
+            count = len(rows)
+        if count == 0:
+            return 0
+
+        self.labels[rows] = value
+        self.progress.set_labeled_many(rows, value != "")
+        with self._dirty_lock:
+            self.pending_bulk.append((self.dirty_rows, rows, value, time.time()))
+            self.dirty_rows = {}
+        self.autosave.notify_edit()
+        self.unsaved_changes = True
+        self.edit_version += 1
+        return count
+
+    def has_prev(self):
+        if self.filter_rows is not None:
+            return np.searchsorted(self.filter_rows, self.current_record, "left") > 0
+        return self.current_record > 0
+
+    def has_next(self):
+        if self.filter_rows is not None:
+            return np.searchsorted(self.filter_rows, self.current_record, "right") < len(self.filter_rows)
+        return self.current_record < len(self.source) - 1
+
+    def go_to(self, index):
+        """跳转到指定记录（从0开始），越界时返回 False"""
+        if not 0 <= index < len(self.source):
+            return False
+        self.current_record = index
+        return True
+
+    def next_record(self):
+        """下一条记录；有搜索结果时只在结果中移动"""
+        if self.filter_rows is not None:
+            position = np.searchsorted(self.filter_rows, self.current_record, "right")
+            return position < len(self.filter_rows) and self.go_to(int(self.filter_rows[position]))
+        return self.go_to(self.current_record + 1)
+
+    def prev_record(self):
+        """上一条记录；有搜索结果时只在结果中移动"""
+        if self.filter_rows is not None:
+            position = np.searchsorted(self.filter_rows, self.current_record, "left")
+            return position > 0 and self.go_to(int(self.filter_rows[position - 1]))
+        return self.go_to(self.current_record - 1)
+
+    def search(self, query):
+        """按关键词过滤记录并跳转到第一条结果
+
+        返回结果数；索引尚未构建完成时返回 None。
+        """
+        rows = self.search_index.search(query)
+        if rows is None:
+            return None
+        self.filter_rows = rows
+        if len(rows):
+            self.go_to(int(rows[0]))
+        return len(rows)
+
+    def clear_filter(self):
+        self.filter_rows = None
+
+    def filter_position(self):
+        """当前记录在搜索结果中的序号（从1开始），不在结果中时返回 None"""
+        if self.filter_rows is None:
+            return None
+        position = np.searchsorted(self.filter_rows, self.current_record)
+        if position < len(self.filter_rows) and self.filter_rows[position] == self.current_record:
+            return int(position) + 1
+        return None
+
+    def next_unlabeled(self):
+        """跳转到当前记录之后的第一条未标注记录"""
+        if self.shared is not None:
+            return self._next_leased()
+        index = self.progress.next_unlabeled(self.current_record)
+        return index is not None and self.go_to(index)
+
+    def prev_unlabeled(self):
+        """跳转到当前记录之前的最后一条未标注记录"""
+        if self.shared is not None:
+            before = [row for row in self._open_leases() if row < self.current_record]
+            return bool(before) and self.go_to(before[-1])
+        index = self.progress.prev_unlabeled(self.current_record)
+        return index is not None and self.go_to(index)
+
+    def _open_leases(self):
+        """自己租用且在本地尚未标注的行（升序）"""
+        self.leased_rows = [row for row in self.leased_rows if self.labels[row] == ""]
+        return self.leased_rows
+
+    def _next_leased(self):
+        """多人模式：跳转到自己租用的下一条未标注记录，租约行都标完后再租一批"""
+        rows = self._open_leases()
+        if not rows:
+            rows = self.leased_rows = self.shared.lease()
+        if not rows:
+            return False
+        after = [row for row in rows if row > self.current_record]
+        return self.go_to(after[0] if after else rows[0])
+
+    def _apply_shared(self, items, update_progress=True):
+        """将共享库中的标注 [(行号, 值), ...] 按值分组向量化写入本地，返回写入的行号集合"""
+        groups = {}
+        for row, value in items:
+            groups.setdefault(value, []).append(row)
+        # 同一行可能有多条记录，以最后一条为准
+        latest = dict(items)
+        changed = set()
+        for value, rows in groups.items():
+            rows = np.array([row for row in rows if latest[row] == value and 0 <= row < len(self.labels)],
+                            dtype=np.int64)
+            if len(rows):
+                self.labels[rows] = value
+                if update_progress:
+                    self.progress.set_labeled_many(rows, value != "")
+                changed.update(rows.tolist())
+        return changed
+
+    def sync_shared(self, watch_row=None):
+        """多人模式：拉取其他标注者提交的标注，并撤销被共享库拒绝的本地修改
+
+        需在界面线程中调用。返回 (被拒绝的行数, watch_row 的标注是否被更新)。
+        """
+        if self.shared is None:
+            return 0, False
+        with self._dirty_lock:
+            rejected = list(self.rejected_rows)
+            pending = set(self.dirty_rows)
+
+        items, self.shared_version = self.shared.labels_since(self.shared_version)
+        # 尚未提交的本地修改不被覆盖
+        changed = self._apply_shared(
+            [(row, value) for row, value in list(items) + rejected if row not in pending]
+        )
+        # 本地标注更新后才移出列表，之前保存的会话文件不会跳过日志中恢复的值
+        with self._dirty_lock:
+            self.rejected_rows = self.rejected_rows[len(rejected):]
+        return len(rejected), watch_row in changed
+
+    def _flush_dirty(self):
+        """将修改过的行写入标注日志并落盘，只写入变化的行"""
+        with self._dirty_lock:
+            bulk, self.pending_bulk = self.pending_bulk, []
+            dirty, self.dirty_rows = self.dirty_rows, {}
+        for before, rows, value, ts in bulk:
+            self._write_rows(before)
+            self.journal.append_bulk(rows, self.label_column, value, ts)
+        self._write_rows(dirty)
+
+        if self.shared is not None and (bulk or dirty):
+            self._commit_shared(bulk, dirty)
+        self.save_state()
+
+    def save_state(self, labels=False, force=False):
+        """保存会话文件（数据源指纹、标注设置、当前位置和标注数组），下次启动可直接恢复
+
+        映射到文件的分类标注只需刷新；其他情况只在 labels 为 True 时写入快照，
+        这会替换标注数组，只能在修改标注的线程中调用。force 为 True 时即使没有新的修改也重写快照。
+        """
+        with self._state_lock:
+            with self._dirty_lock:
+                # 被共享库拒绝的行已在日志中恢复，但本地标注尚未更新时，偏移不前移，下次打开时重放这些记录
+                settled = not self.rejected_rows
+            if self.labels.is_mapped(self.labels_path):
+                # 映射数组已包含日志中的全部修改
+                offset = self.journal.tell()
+                self.labels.flush()
+                if settled:
+                    self.journal_offset = offset
+                self.categories = list(getattr(self.labels, "categories", []))
+            elif labels and (force or self.snapshot_version != self.edit_version):
+                offset = self.journal.tell()
+                self.categories = self.labels.save(self.labels_path)
+                if settled:
+                    self.journal_offset = offset
+                self.snapshot_version = self.edit_version
+            elif self.snapshot_version is None:
+                return
+
+            save_state(self.filepath, {
+                "fingerprint": source_fingerprint(self.filepath),
+                "rows": len(self.source),
+                "language": config.current_language,
+                "label_column": self.label_column,
+                "label_type": self.label_type,
+                "label_options": self.label_options,
+                "new_column": self.new_column,
+                "categories": self.categories,
+                "current_record": self.current_record,
+                "journal_offset": self.journal_offset,
+                **self.load_options,
+            })
+
+    def _commit_shared(self, bulk, dirty):
+        """在一个事务中把修改提交到共享库
+
+        被拒绝的行立即在日志中恢复为共享库中的值（导出和下次打开时以共享库为准），
+        本地标注数组由界面线程在 sync_shared 中更新。
+        """
+        items = {}
+        for before, rows, value, ts in bulk:
+            items.update((row, v) for row, (v, _) in before.items())
+            rows = range(rows.start, rows.stop) if isinstance(rows, slice) else rows.tolist()
+            items.update(dict.fromkeys(rows, value))
+        items.update((row, v) for row, (v, _) in dirty.items())
+
+        rejected = self.shared.commit(sorted(items.items()))
+        self.shared.renew()
+        if rejected:
+            stored = self.shared.labels_for(rejected)
+            restore = [(row, stored.get(row, "")) for row in rejected]
+            now = time.time()
+            self.journal.append_batch((row, self.label_column, value, now) for row, value in restore)
+            with self._dirty_lock:
+                self.rejected_rows.extend(restore)
+
+    def _write_rows(self, dirty):
+        if dirty:
+            self.journal.append_batch(
+                (row, self.label_column, value, ts) for row, (value, ts) in sorted(dirty.items())
+            )
+
+    def flush(self):
+        """立即保存全部未写入日志的修改"""
+        self._flush_dirty()
+
+    def snapshot(self):
+        """获取标注的一致快照 (标注副本, 修改版本号)，需在修改标注的线程中调用"""
+        return self.labels.copy(), self.edit_version
+
+    def export(self, filename, labels=None, progress=None, fmt="csv"):
+        """导出完整的标注数据文件，返回 save_annotated_data 的结果
+
+        在后台线程导出时应传入 snapshot() 得到的标注副本。fmt 为导出格式。
+        """
+        if labels is None:
+            labels = self.labels
+        return save_annotated_data(
+            self.source, labels, self.label_column, self.filepath, filename, progress, fmt
+        )
+
+    def mark_exported(self, version=None):
+        """导出成功后压缩日志，每行只保留最终标注
+
+        version 为导出快照的版本号；导出期间又有修改时仍保留未保存状态。
+        """
+        self.unsaved_changes = version is not None and version != self.edit_version
+        # 压缩后日志偏移失效，在同一把锁内重写标注快照
+        with self._state_lock:
+            self.journal.compact()
+            self.journal_offset = 0
+            self.save_state(labels=True, force=True)
+
+    def close(self):
+        self.search_index.cancel()
+        self.autosave.close()
+        self._flush_dirty()
+        if self.shared is not None:
+            # 关闭前把被拒绝的行恢复为共享库中的值，标注快照与共享库一致
+            try:
+                self.sync_shared()
+            except Exception as e:
+                print(f"Error syncing shared store: {e}")
+        self.save_state(labels=True)
+        self.journal.close()
+        if self.shared is not None:
+            self.shared.close()
+        self.record_cache.close()
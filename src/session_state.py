@@ -0,0 +1,76 @@
+import json
+import os
+import time
+
+from .config import config
+from .dataset_paths import sidecar_base, source_fingerprint
+
+# 会话文件的格式版本，格式变化时递增以使旧会话失效
+STATE_VERSION = 1
+
+
+def state_path(source_path):
+    """会话文件路径"""
+    return f"{sidecar_base(source_path)}.session.json"
+
+
+def labels_path(source_path):
+    """标注数组文件路径"""
+    return f"{sidecar_base(source_path)}.labels.npy"
+
+
+def last_session_path():
+    """记录最近一次会话的数据源路径的文件"""
+    return os.path.join(config.cache_dir, "last_session.json")
+
+
+def _write_json(path, data):
+    """先写临时文件再替换，崩溃时不会留下写了一半的文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def save_state(source_path, state):
+    """保存会话文件，目录不可写时忽略"""
+    state = dict(state, version=STATE_VERSION, source=source_path, saved_at=time.time())
+    try:
+        _write_json(state_path(source_path), state)
+    except OSError as e:
+        print(f"Error saving session state: {e}")
+
+
+def load_state(source_path):
+    """读取会话文件；数据源已修改、格式版本不符或标注数组缺失时返回 None"""
+    try:
+        with open(state_path(source_path), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != STATE_VERSION or state.get("source") != source_path:
+            return None
+        if state.get("fingerprint") != source_fingerprint(source_path):
+            return None
+        if not os.path.exists(labels_path(source_path)):
+            return None
+        return state
+    except (OSError, ValueError):
+        return None
+
+
+def remember_session(source_path):
+    """记录最近一次打开的数据源，下次启动时提供恢复"""
+    try:
+        os.makedirs(config.cache_dir, exist_ok=True)
+        _write_json(last_session_path(), {"source": source_path})
+    except OSError as e:
+        print(f"Error saving last session: {e}")
+
+
+def load_last_state():
+    """最近一次会话的状态，不存在或已失效时返回 None"""
+    try:
+        with open(last_session_path(), "r", encoding="utf-8") as f:
+            source_path = json.load(f)["source"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return load_state(source_path)
@@ -0,0 +1,112 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .dataset_paths import list_shards
+from .record_source import (
+    RecordSource, CsvRecordSource, CSV_READ_OPTIONS, load_or_build_row_index, read_csv_chunks, detect_encoding,
+    _parse_row
+)
+
+# 同时保持打开的分片数，超过时关闭最久未访问的分片
+MAX_OPEN_SHARDS = 8
+
+
+def _read_header(filepath, offsets):
+    """读取分片的表头"""
+    with open(filepath, "rb") as f:
+        header_bytes = f.read(int(offsets[0]) if len(offsets) else os.path.getsize(filepath))
+    return _parse_row(header_bytes, detect_encoding(filepath))
+
+
+class ShardedRecordSource(RecordSource):
+    """由多个CSV分片组成的逻辑数据集
+
+    打开时只扫描（或从侧车文件读取）各分片的行索引以统计行数，
+    全局行号通过行数前缀和二分查找定位到 (分片, 分片内行号)，
+    分片在导航到达时才打开，最多同时打开 MAX_OPEN_SHARDS 个。
+    """
+
+    def __init__(self, path, progress=None, cancel_event=None):
+        self.path = path
+        self.shard_paths = list_shards(path)
+        if not self.shard_paths:
+            raise ValueError(f"No CSV shards found: {path}")
+
+        counts = []
+        bytes_done = 0
+        rows_done = 0
+        for shard_path in self.shard_paths:
+            def shard_progress(bytes_read, rows, base_bytes=bytes_done, base_rows=rows_done):
+                if progress:
+                    progress(base_bytes + bytes_read, base_rows + rows)
+
+            offsets = load_or_build_row_index(shard_path, shard_progress, cancel_event)
+            columns = _read_header(shard_path, offsets)
+            if not counts:
+                self.columns = columns
+            elif columns != self.columns:
+                raise ValueError(f"Shard columns do not match: {shard_path}")
+
+            counts.append(len(offsets))
+            bytes_done += os.path.getsize(shard_path)
+            rows_done += len(offsets)
+
+        # starts[k] 为第 k 个分片第一行的全局行号，starts[-1] 为总行数
+        self.starts = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def locate(self, index):
+        """全局行号对应的 (分片序号, 分片内行号)"""
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        shard = int(np.searchsorted(self.starts, index, "right")) - 1
+        return shard, index - int(self.starts[shard])
+
+    def _shard(self, shard):
+        """打开（或复用已打开的）分片，调用方持有 _lock"""
+        source = self._open.get(shard)
+        if source is not None:
+            self._open.move_to_end(shard)
+            return source
+
+        source = CsvRecordSource(self.shard_paths[shard])
+        self._open[shard] = source
+        while len(self._open) > MAX_OPEN_SHARDS:
+            _, old = self._open.popitem(last=False)
+            old.close()
+        return source
+
+    def get_record(self, index):
+        shard, row = self.locate(index)
+        with self._lock:
+            return self._shard(shard).get_record(row)
+
+    def get_column(self, name):
+        # 直接按文件读取，不占用导航使用的分片句柄
+        return pd.concat(
+            [pd.read_csv(p, usecols=[name], encoding=detect_encoding(p), **CSV_READ_OPTIONS)[name]
+             for p in self.shard_paths],
+            ignore_index=True
+        )
+
+    def iter_shard_chunks(self, shard, chunksize=100000):
+        """按块读取一个分片"""
+        return read_csv_chunks(self.shard_paths[shard], chunksize)
+
+    def iter_chunks(self, chunksize=100000):
+        for shard in range(len(self.shard_paths)):
+            yield from self.iter_shard_chunks(shard, chunksize)
+
+    def close(self):
+        with self._lock:
+            for source in self._open.values():
+                source.close()
+            self._open.clear()
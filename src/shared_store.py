@@ -0,0 +1,229 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# 每次租用的行数和租约时长（秒）
+LEASE_BATCH_SIZE = 50
+LEASE_SECONDS = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS labels (
+    row INTEGER PRIMARY KEY,
+    value TEXT NOT NULL,
+    annotator TEXT NOT NULL,
+    ts REAL NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS labels_version ON labels (version);
+CREATE TABLE IF NOT EXISTS leases (
+    row INTEGER PRIMARY KEY,
+    annotator TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leases_expires ON leases (expires);
+CREATE INDEX IF NOT EXISTS leases_annotator ON leases (annotator);
+"""
+
+
+class SharedAnnotationStore:
+    """多人共享的标注库（SQLite WAL 模式），以租约分配未标注的行
+
+    每个标注者租用一批未标注的行，租约有效期内其他人不会分到这些行。
+    标注在事务中提交：已被他人标注、或被他人持有有效租约的行会被拒绝，保证每行只被标注一次。
+    next_row 之前的每一行要么已标注（labels），要么在租约表中（可能已过期），因此不会丢失。
+    导入的已有标注（import_labels）没有所属标注者（annotator 为空），任何人都可以修改或清除，
+    提交后该行归提交者所有。
+    """
+
+    def __init__(self, path, annotator, total_rows, label_column,
+                 lease_seconds=LEASE_SECONDS, batch_size=LEASE_BATCH_SIZE):
+        self.path = path
+        self.annotator = annotator
+        self.total_rows = total_rows
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+        self.created = False
+
+        # 界面线程和自动保存线程共用一个连接
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        with self._transaction():
+            meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+            if not meta:
+                self.conn.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?)",
+                    [("rows", str(total_rows)), ("label_column", label_column),
+                     ("next_row", "0"), ("version", "0")]
+                )
+                self.created = True
+            elif int(meta["rows"]) != total_rows or meta["label_column"] != label_column:
+                raise ValueError(f"Shared store {path} belongs to a different dataset or label column")
+
+    @contextmanager
+    def _transaction(self):
+        """写事务：BEGIN IMMEDIATE 立即获取写锁，避免提交时才发现冲突"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _meta(self, key):
+        return self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    def _next_version(self):
+        version = int(self._meta("version")) + 1
+        self.conn.execute("UPDATE meta SET value = ? WHERE key = 'version'", (str(version),))
+        return version
+
+    def import_labels(self, items):
+        """导入已有的标注 [(行号, 值), ...]，只在新建共享库时调用"""
+        with self._transaction():
+            version = self._next_version()
+            now = time.time()
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO labels (row, value, annotator, ts, version) VALUES (?, ?, '', ?, ?)",
+                ((int(row), value, now, version) for row, value in items)
+            )
+
+    def lease(self, count=None):
+        """租用一批未标注的行，返回升序行号列表
+
+        优先接手已过期的租约，不足时从 next_row 开始分配新行（跳过已标注或已租出的行）。
+        """
+        count = count or self.batch_size
+        now = time.time()
+        expires = now + self.lease_seconds
+        with self._transaction():
+            rows = [row for (row,) in self.conn.execute(
+                "SELECT row FROM leases WHERE expires < ? ORDER BY row LIMIT ?", (now, count)
+            )]
+
+            mark = int(self._meta("next_row"))
+            while len(rows) < count and mark < self.total_rows:
+                stop = min(mark + (count - len(rows)) * 2 + 64, self.total_rows)
+                taken = {row for (row,) in self.conn.execute(
+                    "SELECT row FROM labels WHERE row >= ?1 AND row < ?2 "
+                    "UNION SELECT row FROM leases WHERE row >= ?1 AND row < ?2",
+                    (mark, stop)
+                )}
+                while mark < stop and len(rows) < count:
+                    if mark not in taken:
+                        rows.append(mark)
+                    mark += 1
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO leases (row, annotator, expires) VALUES (?, ?, ?)",
+                ((row, self.annotator, expires) for row in rows)
+            )
+            self.conn.execute("UPDATE meta SET value = ? WHERE key = 'next_row'", (str(mark),))
+        return sorted(rows)
+
+    def my_leases(self):
+        """当前标注者持有的全部租约行（含已过期但未被他人接手的）"""
+        with self._lock:
+            return [row for (row,) in self.conn.execute(
+                "SELECT row FROM leases WHERE annotator = ? ORDER BY row", (self.annotator,)
+            )]
+
+    def renew(self):
+        """延长当前标注者全部租约的有效期"""
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE leases SET expires = ? WHERE annotator = ?",
+                (time.time() + self.lease_seconds, self.annotator)
+            )
+
+    def release(self):
+        """归还未完成的租约，其他标注者可以立即接手"""
+        with self._transaction():
+            self.conn.execute("UPDATE leases SET expires = 0 WHERE annotator = ?", (self.annotator,))
+
+    def commit(self, items):
+        """在一个事务中提交标注 [(行号, 值), ...]，返回被拒绝的行号列表
+
+        行已被他人标注（导入的标注不属于任何人，不会因此被拒绝），或被他人持有有效租约时拒绝；
+        值为空字符串表示撤销标注，该行重新作为自己的租约保留。
+        """
+        rejected = []
+        now = time.time()
+        with self._transaction():
+            version = self._next_version()
+            for row, value in items:
+                row = int(row)
+                owner = self.conn.execute(
+                    "SELECT annotator FROM labels WHERE row = ? AND value != ''", (row,)
+                ).fetchone()
+                if owner is not None and owner[0] not in ("", self.annotator):
+                    rejected.append(row)
+                    continue
+                lease = self.conn.execute(
+                    "SELECT annotator, expires FROM leases WHERE row = ?", (row,)
+                ).fetchone()
+                if lease is not None and lease[0] != self.annotator and lease[1] >= now:
+                    rejected.append(row)
+                    continue
+
+                # 撤销标注时保留空值记录，其他标注者同步时据此清除该行
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO labels (row, value, annotator, ts, version) VALUES (?, ?, ?, ?, ?)",
+                    (row, value, self.annotator, now, version)
+                )
+                if value == "":
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO leases (row, annotator, expires) VALUES (?, ?, ?)",
+                        (row, self.annotator, now + self.lease_seconds)
+                    )
+                else:
+                    self.conn.execute("DELETE FROM leases WHERE row = ?", (row,))
+        return rejected
+
+    def labels_since(self, version):
+        """自 version 之后提交的标注，返回 ([(行号, 值), ...], 最新版本号)"""
+        with self._lock:
+            # 在同一个读事务中读取，保证标注与版本号一致
+            self.conn.execute("BEGIN")
+            try:
+                items = self.conn.execute(
+                    "SELECT row, value FROM labels WHERE version > ? ORDER BY version", (version,)
+                ).fetchall()
+                latest = int(self._meta("version"))
+            finally:
+                self.conn.execute("COMMIT")
+        return items, latest
+
+    def labels_for(self, rows):
+        """指定行在共享库中的标注 {行号: 值}，从未提交过的行不包含在内"""
+        result = {}
+        with self._lock:
+            for row in rows:
+                found = self.conn.execute("SELECT value FROM labels WHERE row = ?", (int(row),)).fetchone()
+                if found is not None:
+                    result[int(row)] = found[0]
+        return result
+
+    def stats(self):
+        """共享库统计：已标注行数、有效租约数、参与的标注者数"""
+        with self._lock:
+            labeled = self.conn.execute("SELECT COUNT(*) FROM labels WHERE value != ''").fetchone()[0]
+            leased = self.conn.execute(
+                "SELECT COUNT(*) FROM leases WHERE expires >= ?", (time.time(),)
+            ).fetchone()[0]
+            annotators = self.conn.execute(
+                "SELECT COUNT(DISTINCT annotator) FROM labels WHERE annotator != '' AND value != ''"
+            ).fetchone()[0]
+        return {"labeled": labeled, "leased": leased, "annotators": annotators}
+
+    def close(self):
+        self.release()
+        with self._lock:
+            self.conn.close()
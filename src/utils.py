@@ -1,62 +1,168 @@
-import pandas as pd
 import os
+import shutil
+import time
 from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox
 from datetime import datetime
 from .config import config
+from .instrumentation import timed
+from .writers import open_writer, format_extension, fsync_file
 
 
-def load_data_file(filepath):
-    """加载数据文件，支持CSV和Excel格式"""
+@timed("load_data_file")
+def load_data_file(filepath, progress=None, cancel_event=None, sheet_name=None, compact=False):
+    """加载数据文件，支持CSV和Excel格式，返回可按行随机读取的记录源
+
+    progress(已读字节数, 已读行数) 在加载线程中调用，字节数未知时为 None；
+    cancel_event 被设置时中止解析。sheet_name 指定要读取的Excel工作表。
+    compact 为 True 时将数据读入内存并压缩列类型。
+    """
+    # 数据处理依赖在用到时才导入，不拖慢启动
+    from .record_source import open_record_source, LoadCancelled
     try:
-        if filepath.endswith('.csv'):
-            df = pd.read_csv(filepath)
-        elif filepath.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(filepath)
-        else:
+        source = open_record_source(filepath, progress, cancel_event, sheet_name, compact)
+        if source is None:
             return None, config.get("invalid_file_msg")
 
         # 检查数据是否为空
-        if df.empty:
+        if len(source) == 0 or not source.columns:
+            source.close()
             return None, config.get("invalid_file_msg")
 
-        return df, None
+        return source, None
+    except LoadCancelled:
+        return None, config.get("load_cancelled")
     except Exception as e:
         print(f"Error loading file: {e}")
         return None, config.get("invalid_file_msg")
 
 
-def save_annotated_data(df, original_path, filename):
-    """保存标注后的数据"""
+@timed("save_annotated_data")
+def save_annotated_data(source, labels, label_column, original_path, filename, progress=None, fmt="csv"):
+    """保存标注后的数据：按块读取记录源并写入标注列
+
+    先写入临时文件，fsync 后再重命名，保存中断时不会留下不完整的文件。
+    progress(已写行数, 总行数) 在每块写完后调用。labels 应为不会被同时修改的快照。
+    fmt 为导出格式，见 writers.FORMATS。
+    返回 (True, (保存路径, 文件大小, 保存时间, 写入速度)) 或 (False, 错误信息)。
+    """
     try:
         if not filename:
             return False, config.get("filename_required")
 
-        # 确定保存路径
-        original_dir = os.path.dirname(original_path)
-        save_path = os.path.join(original_dir, f"{filename}.csv")
-
-        # 避免覆盖
-        counter = 1
-        while os.path.exists(save_path):
-            save_path = os.path.join(original_dir, f"{filename}_{counter}.csv")
-            counter += 1
+        start_time = time.perf_counter()
 
-        # 保存为CSV
-        df.to_csv(save_path, index=False)
+        # 分片数据集按分片写回到同名的输出目录
+        if getattr(source, "shard_paths", None):
+            save_path, size = _save_sharded(source, labels, label_column, original_path, filename, progress, fmt)
+        else:
+            save_path, size = _save_single(source, labels, label_column, original_path, filename, progress, fmt)
 
         # 获取文件信息
-        file_size = os.path.getsize(save_path)
-        file_size_str = f"{file_size / 1024:.2f} KB" if file_size < 1024 * 1024 else f"{file_size / (1024 * 1024):.2f} MB"
+        file_size_str = format_file_size(size)
         save_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        elapsed = max(time.perf_counter() - start_time, 1e-6)
+        throughput = config.get("write_throughput").format(
+            f"{len(labels) / elapsed:,.0f}", format_file_size(size / elapsed)
+        )
 
-        return True, (save_path, file_size_str, save_time)
+        return True, (save_path, file_size_str, save_time, throughput)
     except Exception as e:
         print(f"Error saving file: {e}")
         return False, str(e)
 
 
+def _save_single(source, labels, label_column, original_path, filename, progress, fmt):
+    """导出为单个文件，返回 (保存路径, 文件字节数)"""
+    extension = format_extension(fmt)
+
+    # 确定保存路径
+    original_dir = os.path.dirname(original_path)
+    save_path = os.path.join(original_dir, f"{filename}{extension}")
+
+    # 避免覆盖
+    counter = 1
+    while os.path.exists(save_path):
+        save_path = os.path.join(original_dir, f"{filename}_{counter}{extension}")
+        counter += 1
+
+    # 分块写入，避免一次性载入整个数据集
+    tmp_path = f"{save_path}.tmp"
+    try:
+        written = _write_labeled(tmp_path, fmt, source.iter_chunks(), labels, label_column, 0, progress)
+        # 写出的行数以记录源为准，防止标注错位
+        if written != len(source):
+            raise ValueError(f"Row count mismatch: wrote {written} rows, source has {len(source)}")
+        os.replace(tmp_path, save_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return save_path, os.path.getsize(save_path)
+
+
+def _write_labeled(path, fmt, chunks, labels, label_column, start, progress=None):
+    """将数据块加上标注列写入文件并 fsync；start 为第一块的全局行号，返回写完后的行号"""
+    total = len(labels)
+    writer = open_writer(path, fmt)
+    try:
+        for chunk in chunks:
+            chunk = chunk.copy()
+            chunk[label_column] = list(labels[start:start + len(chunk)])
+            writer.write(chunk)
+            start += len(chunk)
+            if progress:
+                progress(start, total)
+    finally:
+        writer.close()
+    fsync_file(path)
+    return start
+
+
+def _save_sharded(source, labels, label_column, original_path, filename, progress, fmt):
+    """分片数据集的导出：每个分片写入输出目录中的同名文件（扩展名随格式变化）
+
+    先写入临时目录，全部分片写完后再重命名为输出目录。返回 (输出目录, 总字节数)。
+    """
+    original_dir = os.path.dirname(original_path.rstrip("/\\"))
+    save_dir = os.path.join(original_dir, filename)
+
+    # 避免覆盖
+    counter = 1
+    while os.path.exists(save_dir):
+        save_dir = os.path.join(original_dir, f"{filename}_{counter}")
+        counter += 1
+
+    tmp_dir = f"{save_dir}.tmp"
+    try:
+        os.makedirs(tmp_dir)
+        start = 0
+        for shard, shard_path in enumerate(source.shard_paths):
+            name = os.path.splitext(os.path.basename(shard_path))[0] + format_extension(fmt)
+            start = _write_labeled(
+                os.path.join(tmp_dir, name), fmt, source.iter_shard_chunks(shard),
+                labels, label_column, start, progress
+            )
+            # 分片的行数以行索引为准，防止标注错位
+            if start != source.starts[shard + 1]:
+                raise ValueError(f"Row count mismatch in shard: {shard_path}")
+        os.replace(tmp_dir, save_dir)
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+
+    return save_dir, sum(entry.stat().st_size for entry in os.scandir(save_dir))
+
+
+def format_file_size(size):
+    """格式化文件大小"""
+    if size < 1024 * 1024:
+        return f"{size / 1024:.2f} KB"
+    if size < 1024 * 1024 * 1024:
+        return f"{size / (1024 * 1024):.2f} MB"
+    return f"{size / (1024 * 1024 * 1024):.2f} GB"
+
+
 def validate_record_number(input_str, max_records):
     """验证记录号输入是否有效"""
     try:
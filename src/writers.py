@@ -0,0 +1,137 @@
+import gzip
+import importlib.util
+import io
+import os
+
+
+class ChunkWriter:
+    """分块写入器基类：逐块写入数据，内存占用只与块大小有关"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, chunk):
+        raise NotImplementedError
+
+    def close(self):
+        """写完全部数据后调用，返回前数据需已写入文件"""
+
+
+class CsvWriter(ChunkWriter):
+    """CSV 写入器，可选 gzip 或 zstd 压缩"""
+
+    def __init__(self, path, compression=None):
+        super().__init__(path)
+        self._raw = open(path, "wb")
+        if compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        elif compression == "zstd":
+            import zstandard
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = None
+        self._text = io.TextIOWrapper(self._stream or self._raw, encoding="utf-8", newline="")
+        self._header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self._text, index=False, header=self._header)
+        self._header = False
+
+    def close(self):
+        # 依次关闭文本层、压缩层和文件
+        self._text.flush()
+        self._text.detach()
+        if self._stream is not None:
+            self._stream.close()
+        self._raw.close()
+
+
+class JsonlWriter(CsvWriter):
+    """JSON Lines 写入器：每行一条记录，可选压缩"""
+
+    def write(self, chunk):
+        if len(chunk):
+            self._text.write(chunk.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n") + "\n")
+
+
+class ArrowWriter(ChunkWriter):
+    """Parquet 和 Feather（Arrow IPC 文件）写入器，以第一块的结构作为文件结构"""
+
+    def __init__(self, path, file_format):
+        super().__init__(path)
+        import pyarrow
+        self.pa = pyarrow
+        self.file_format = file_format
+        self._writer = None
+        self.schema = None
+
+    def _text_columns(self, chunk):
+        """object 列的值转为字符串（缺失值保留为空），使其类型不随各块的取值变化"""
+        chunk = chunk.copy()
+        for name in chunk.columns[chunk.dtypes == object]:
+            values = chunk[name]
+            chunk[name] = values.where(values.isna(), values.astype(str))
+        return chunk
+
+    def write(self, chunk):
+        chunk = self._text_columns(chunk)
+        if self._writer is None:
+            # 文件结构由各列的 dtype 决定：object 列固定为字符串，其他列按第一块推断
+            # （同一数据源各块的 dtype 相同），不依赖第一块中的取值（例如整列为空）
+            inferred = self.pa.Schema.from_pandas(chunk, preserve_index=False)
+            object_columns = set(chunk.columns[chunk.dtypes == object])
+            self.schema = self.pa.schema([
+                field.with_type(self.pa.string()) if field.name in object_columns else field
+                for field in inferred
+            ], metadata=inferred.metadata)
+            if self.file_format == "parquet":
+                import pyarrow.parquet
+                self._writer = pyarrow.parquet.ParquetWriter(self.path, self.schema)
+            else:
+                import pyarrow.ipc
+                self._writer = pyarrow.ipc.new_file(self.path, self.schema)
+        table = self.pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+# 导出格式: (文件扩展名, 创建写入器的函数, 需要的可选依赖)
+FORMATS = {
+    "csv": (".csv", lambda path: CsvWriter(path), None),
+    "csv.gz": (".csv.gz", lambda path: CsvWriter(path, "gzip"), None),
+    "csv.zst": (".csv.zst", lambda path: CsvWriter(path, "zstd"), "zstandard"),
+    "jsonl": (".jsonl", lambda path: JsonlWriter(path), None),
+    "parquet": (".parquet", lambda path: ArrowWriter(path, "parquet"), "pyarrow"),
+    "feather": (".feather", lambda path: ArrowWriter(path, "feather"), "pyarrow"),
+}
+
+
+def available_formats():
+    """当前环境可用的导出格式（可选依赖未安装的格式不列出）
+
+    只查找依赖是否安装而不导入（导入 pyarrow 需要数秒），依赖在创建写入器时才导入。
+    """
+    return [
+        name for name, (_, _, requirement) in FORMATS.items()
+        if requirement is None or importlib.util.find_spec(requirement) is not None
+    ]
+
+
+def format_extension(fmt):
+    return FORMATS[fmt][0]
+
+
+def open_writer(path, fmt):
+    """按格式创建写入器"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return FORMATS[fmt][1](path)
+
+
+def fsync_file(path):
+    """确保文件内容已落盘"""
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())